@@ -0,0 +1,390 @@
+"""
+⏱️ Benchmark suite for the DataConverter methods
+Run: python bench_converters.py run --sizes 1KB,1MB,10MB
+     python bench_converters.py compare baseline.json bench_results.json
+
+Inputs are generated from a fixed seed in four shapes (narrow, wide, nested,
+unicode) at any size from 1 KB to 1 GB and cached on disk, so large files are
+only written once. Every conversion method runs in a fresh worker process
+against a file on disk, reporting time, MB/s, rows/s, peak RSS and peak
+tracemalloc. Results are saved as JSON; compare mode exits with status 1 when
+a method got slower (or hungrier) than the baseline by more than --threshold.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_all_start_methods, get_context
+from pathlib import Path
+from typing import Tuple
+from xml.sax.saxutils import XMLGenerator
+
+# Import the app without touching a real database or the result cache
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("CACHE_MEMORY_MB", "0")
+os.environ.setdefault("CACHE_DISK_MB", "0")
+
+import yaml
+import main
+from main import DataConverter, CONVERSION_METHODS, YamlDumper
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SHAPES = ("narrow", "wide", "nested", "unicode")
+SIZE_UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+FILE_EXTENSIONS = {"csv": "csv", "json": "json", "ndjson": "ndjson", "xml": "xml", "yaml": "yaml"}
+METHOD_PARAMS = {"root_name": "data", "table_name": "data"}
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet"]
+CITIES = ["NYC", "LA", "Chicago", "Houston", "Phoenix", "Mumbai", "Berlin", "São Paulo"]
+UNICODE_TEXT = ["東京", "Zürich", "Ελληνικά", "русский", "हिन्दी", "العربية", "🚀✨", "naïve café", "한국어", "שלום"]
+
+def print_section(title):
+    print(f"\n{'='*50}")
+    print(f"  {title}")
+    print(f"{'='*50}\n")
+
+def parse_size(label: str) -> int:
+    """'1KB' / '10MB' / '1GB' → bytes"""
+    label = label.strip().upper()
+    for unit, factor in SIZE_UNITS.items():
+        if label.endswith(unit):
+            return int(float(label[:-len(unit)]) * factor)
+    return int(label)
+
+# ============================================================================
+# SYNTHETIC DATA
+# ============================================================================
+
+def make_record(rng: random.Random, shape: str, i: int) -> dict:
+    """One synthetic record of the given shape"""
+    if shape == "narrow":
+        return {
+            "id": i,
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)}",
+            "score": round(rng.uniform(0, 100), 2),
+            "active": rng.random() < 0.5,
+            "city": rng.choice(CITIES)
+        }
+    if shape == "wide":
+        record = {"id": i}
+        for column in range(60):
+            kind = column % 3
+            if kind == 0:
+                record[f"c{column}"] = rng.randint(0, 100000)
+            elif kind == 1:
+                record[f"c{column}"] = round(rng.uniform(-1000, 1000), 3)
+            else:
+                record[f"c{column}"] = rng.choice(WORDS)
+        return record
+    if shape == "nested":
+        return {
+            "id": i,
+            "user": {"name": rng.choice(WORDS), "email": f"{rng.choice(WORDS)}{i}@example.com"},
+            "tags": [rng.choice(WORDS) for _ in range(rng.randint(1, 4))],
+            "stats": {"views": rng.randint(0, 10 ** 6), "ratio": round(rng.random(), 4)}
+        }
+    if shape == "unicode":
+        return {
+            "id": i,
+            "name": " ".join(rng.choice(UNICODE_TEXT) for _ in range(2)),
+            "city": rng.choice(CITIES),
+            "note": " ".join(rng.choice(UNICODE_TEXT) for _ in range(rng.randint(3, 8)))
+        }
+    raise ValueError(f"Unknown shape '{shape}'")
+
+def flatten(record: dict, prefix: str = "") -> dict:
+    """Nested record → flat CSV row (dotted keys, lists joined with ';')"""
+    row = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            row.update(flatten(value, f"{name}."))
+        elif isinstance(value, list):
+            row[name] = ";".join(str(item) for item in value)
+        else:
+            row[name] = value
+    return row
+
+def write_xml_value(xml: XMLGenerator, value):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            xml.startElement(key, {})
+            write_xml_value(xml, child)
+            xml.endElement(key)
+    elif isinstance(value, list):
+        for child in value:
+            xml.startElement("item", {})
+            write_xml_value(xml, child)
+            xml.endElement("item")
+    else:
+        xml.characters(str(value))
+
+def generate_input(path: Path, fmt: str, shape: str, target_size: int, seed: int) -> int:
+    """Write records to path until it reaches target_size bytes; returns the row count"""
+    rng = random.Random(f"{seed}-{shape}")
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = None
+        elif fmt == "json":
+            f.write("[")
+        elif fmt == "xml":
+            xml = XMLGenerator(f, encoding="utf-8", short_empty_elements=True)
+            xml.startElement("data", {})
+
+        while f.tell() < target_size or rows == 0:
+            record = make_record(rng, shape, rows)
+            if fmt == "csv":
+                row = flatten(record)
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=row.keys())
+                    writer.writeheader()
+                writer.writerow(row)
+            elif fmt == "json":
+                f.write(("\n" if rows == 0 else ",\n") + json.dumps(record, ensure_ascii=False))
+            elif fmt == "ndjson":
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            elif fmt == "xml":
+                xml.startElement("item", {})
+                write_xml_value(xml, record)
+                xml.endElement("item")
+            elif fmt == "yaml":
+                f.write(yaml.dump([record], Dumper=YamlDumper, default_flow_style=False, allow_unicode=True))
+            rows += 1
+
+        if fmt == "json":
+            f.write("\n]")
+        elif fmt == "xml":
+            xml.endElement("data")
+    return rows
+
+def input_file(data_dir: Path, fmt: str, shape: str, size_label: str, seed: int) -> Tuple[Path, int]:
+    """Cached generated input and its row count"""
+    path = data_dir / f"{shape}-{size_label}-{seed}.{FILE_EXTENSIONS[fmt]}"
+    meta_path = path.with_suffix(path.suffix + ".meta.json")
+    if path.exists() and meta_path.exists():
+        return path, json.loads(meta_path.read_text())["rows"]
+
+    data_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    rows = generate_input(path, fmt, shape, parse_size(size_label), seed)
+    meta_path.write_text(json.dumps({"rows": rows, "bytes": path.stat().st_size}))
+    print(f"  generated {path.name} ({rows} rows) in {time.perf_counter() - started:.1f}s")
+    return path, rows
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def max_rss_mb() -> float:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def consume(result) -> int:
+    """Drain a converter result the way a response would; returns output bytes"""
+    chunks = [result] if isinstance(result, (str, bytes)) else result
+    size = 0
+    for chunk in chunks:
+        size += len(chunk.encode("utf-8")) if isinstance(chunk, str) else len(chunk)
+    return size
+
+def measure(method: str, args: list, path: str, repeat: int, trace: bool) -> dict:
+    """Worker-process entry point: time one method on one input file"""
+    converter = getattr(DataConverter, method)
+    rss_before = max_rss_mb()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output_bytes = consume(converter(Path(path), *args))
+        timings.append(time.perf_counter() - started)
+    rss_after = max_rss_mb()
+
+    traced_peak = None
+    if trace:
+        tracemalloc.start()
+        consume(converter(Path(path), *args))
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    return {
+        "seconds": min(timings),
+        "output_bytes": output_bytes,
+        "peak_rss_mb": rss_after,
+        "rss_growth_mb": None if rss_after is None else max(0.0, rss_after - rss_before),
+        "peak_tracemalloc_mb": traced_peak
+    }
+
+def run_case(method: str, args: list, path: Path, repeat: int, trace: bool) -> dict:
+    """Run measure() in a fresh process so RSS peaks don't leak between cases"""
+    context = get_context("fork" if "fork" in get_all_start_methods() else "spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(measure, method, args, str(path), repeat, trace).result()
+
+def benchmark_methods(selected: list) -> list:
+    """(source, target, method, args) for every conversion, optionally filtered"""
+    methods = []
+    for (source, target), (method, param_names) in CONVERSION_METHODS.items():
+        name = f"{source}_to_{target}"
+        if selected and name not in selected and method not in selected:
+            continue
+        methods.append((source, target, method, [METHOD_PARAMS[p] for p in param_names]))
+    return methods
+
+def run(args) -> int:
+    print_section("⏱️ DataConverter Benchmarks")
+    data_dir = Path(args.data_dir)
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    shapes = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    selected = [m.strip() for m in args.methods.split(",") if m.strip()] if args.methods else []
+
+    results = []
+    for source, target, method, method_args in benchmark_methods(selected):
+        for shape in shapes:
+            for size_label in sizes:
+                path, rows = input_file(data_dir, source, shape, size_label, args.seed)
+                input_bytes = path.stat().st_size
+                try:
+                    measured = run_case(method, method_args, path, args.repeat, not args.no_tracemalloc)
+                    error = None
+                except Exception as e:
+                    measured, error = {}, f"{type(e).__name__}: {e}"
+
+                result = {
+                    "conversion": f"{source}_to_{target}",
+                    "method": method,
+                    "shape": shape,
+                    "size": size_label,
+                    "input_bytes": input_bytes,
+                    "rows": rows,
+                    **measured,
+                    "error": error
+                }
+                if not error:
+                    seconds = max(result["seconds"], 1e-9)
+                    result["mb_per_s"] = input_bytes / (1024 * 1024) / seconds
+                    result["rows_per_s"] = rows / seconds
+                results.append(result)
+                print_result(result)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "yaml_backend": main.YAML_BACKEND,
+            "seed": args.seed,
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        return compare_reports(json.loads(Path(args.compare).read_text()), report,
+                               args.threshold, args.min_seconds)
+    return 1 if any(r["error"] for r in results) else 0
+
+def print_result(result: dict):
+    name = f"{result['conversion']:<16} {result['shape']:<8} {result['size']:>6}"
+    if result["error"]:
+        print(f"  ❌ {name}  {result['error']}")
+        return
+    traced = result["peak_tracemalloc_mb"]
+    print(
+        f"  {name}  {result['seconds'] * 1000:>10.1f} ms  {result['mb_per_s']:>8.2f} MB/s"
+        f"  {result['rows_per_s']:>11.0f} rows/s"
+        f"  rss {result['peak_rss_mb'] or 0:>7.1f} MB"
+        + (f"  traced {traced:>7.2f} MB" if traced is not None else "")
+    )
+
+# ============================================================================
+# REGRESSION GATE
+# ============================================================================
+
+def compare_reports(baseline: dict, current: dict, threshold: float, min_seconds: float) -> int:
+    """Print per-case changes; return 1 if anything regressed past threshold
+
+    A case regresses when it is more than threshold slower, or its traced
+    peak memory grew by more than threshold (and at least 1 MB). Cases
+    faster than min_seconds in both runs are too noisy to judge on time.
+    """
+    print_section(f"📊 Comparison (threshold {threshold:.0%})")
+    key = lambda r: (r["conversion"], r["shape"], r["size"])
+    previous = {key(r): r for r in baseline["results"] if not r.get("error")}
+
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(key(result))
+        if before is None or result.get("error"):
+            continue
+
+        problems = []
+        time_ratio = result["seconds"] / max(before["seconds"], 1e-9)
+        if time_ratio > 1 + threshold and max(result["seconds"], before["seconds"]) >= min_seconds:
+            problems.append(f"time x{time_ratio:.2f}")
+
+        old_mem, new_mem = before.get("peak_tracemalloc_mb"), result.get("peak_tracemalloc_mb")
+        if old_mem is not None and new_mem is not None:
+            if new_mem > old_mem * (1 + threshold) and new_mem - old_mem >= 1:
+                problems.append(f"memory {old_mem:.1f} → {new_mem:.1f} MB")
+
+        status = "❌" if problems else "✅"
+        print(f"  {status} {key(result)[0]:<16} {key(result)[1]:<8} {key(result)[2]:>6}  "
+              f"{before['seconds'] * 1000:>9.1f} → {result['seconds'] * 1000:>9.1f} ms  {'; '.join(problems)}")
+        if problems:
+            regressions.append(key(result))
+
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} regression(s) past {threshold:.0%}")
+        return 1
+    print("\n🎉 No regressions")
+    return 0
+
+def compare(args) -> int:
+    baseline = json.loads(Path(args.baseline).read_text())
+    current = json.loads(Path(args.current).read_text())
+    return compare_reports(baseline, current, args.threshold, args.min_seconds)
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the DataConverter methods")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="generate inputs and time every conversion")
+    run_parser.add_argument("--sizes", default="1KB,100KB,1MB", help="comma-separated, e.g. 1KB,10MB,1GB")
+    run_parser.add_argument("--shapes", default=",".join(SHAPES), help=f"any of {', '.join(SHAPES)}")
+    run_parser.add_argument("--methods", default="", help="e.g. csv_to_json,xml_to_csv (default: all)")
+    run_parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is kept)")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--data-dir", default=".bench_data", help="where generated inputs are cached")
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--no-tracemalloc", action="store_true", help="skip the (slow) traced run")
+    run_parser.add_argument("--compare", help="baseline results to gate against")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown, 0.15 = 15%%")
+        sub.add_argument("--min-seconds", type=float, default=0.01, help="ignore timing changes below this")
+
+    args = parser.parse_args()
+    return run(args) if args.command == "run" else compare(args)
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
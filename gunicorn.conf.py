@@ -0,0 +1,27 @@
+"""
+Gunicorn settings (read automatically from the working directory)
+
+Each UvicornWorker keeps its own Prometheus samples. Pointing
+PROMETHEUS_MULTIPROC_DIR at a directory they share lets /metrics in any
+worker report the totals; it has to be set before prometheus_client is
+imported, so it is set here in the master before workers are forked.
+"""
+
+import os
+import shutil
+import tempfile
+
+PROMETHEUS_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "data-converter-metrics")
+)
+
+from prometheus_client import multiprocess
+
+def on_starting(server):
+    """Drop samples left over from the previous run"""
+    shutil.rmtree(PROMETHEUS_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_DIR, exist_ok=True)
+
+def child_exit(server, worker):
+    """Stop counting a dead worker's in-flight gauges"""
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,333 @@
+"""
+🔥 In-process load test for the Data Converter API
+Run: python load_test.py --users 20 --duration 30
+     python load_test.py --endpoints csv-to-json,csv-to-sql --plans free:50,pro:50
+
+Drives main:app through httpx's ASGI transport (no server, no network) with
+a pool of concurrent virtual users. Each virtual user is anonymous or holds a
+free/pro/premium API key, and keeps posting files drawn from the size mix to
+the chosen endpoints until the duration is up. Reports p50/p95/p99 latency,
+throughput and error rate per endpoint, and how much of each request went to
+the conversion itself versus database queries on get_db sessions (API key
+lookup, rate limit and billing).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+# A throwaway database and no result cache, so every request does real work
+_tmp_dir = tempfile.mkdtemp(prefix="loadtest-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp_dir}/loadtest.db")
+os.environ.setdefault("CACHE_MEMORY_MB", "0")
+os.environ.setdefault("CACHE_DISK_MB", "0")
+os.environ.setdefault("JOB_DIR", f"{_tmp_dir}/jobs")
+
+import httpx
+from sqlalchemy.orm import Session, sessionmaker
+
+import main
+from main import User
+from bench_converters import SHAPES, input_file, print_section
+
+PLANS = ("anonymous", "free", "pro", "premium")
+DEFAULT_ENDPOINTS = "csv-to-json,json-to-csv,csv-to-xml,xml-to-json,csv-to-sql,json-to-yaml"
+
+# Timing buckets of the request a virtual user is currently making
+request_timings: ContextVar[dict] = ContextVar("request_timings", default=None)
+
+def parse_mix(spec: str) -> list:
+    """'1KB:70,1MB:30' → [('1KB', 70.0), ('1MB', 30.0)] (weight defaults to 1)"""
+    mix = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.strip().partition(":")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+
+@contextmanager
+def timed(bucket: str):
+    """Add the time spent in the block to the current request's bucket"""
+    timings = request_timings.get()
+    if timings is None or timings["_active"]:
+        yield
+        return
+    timings["_active"] = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[bucket] += time.perf_counter() - started
+        timings["_active"] = False
+
+class TimedSession(Session):
+    """Session that charges its queries and commits to the request's db bucket"""
+
+    def execute(self, *args, **kwargs):
+        with timed("db"):
+            return super().execute(*args, **kwargs)
+
+    def commit(self):
+        with timed("db"):
+            return super().commit()
+
+def timed_chunks(chunks, timings: dict):
+    """Charge the time spent producing each chunk to the convert bucket
+
+    Chunks are pulled from the threadpool by StreamingResponse, where the
+    request's context isn't available, so the bucket dict is bound here.
+    """
+    chunks = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            timings["convert"] += time.perf_counter() - started
+            return
+        timings["convert"] += time.perf_counter() - started
+        yield chunk
+
+def instrument_app():
+    """Route main's DB sessions and conversions through the timers"""
+    main.SessionLocal = sessionmaker(bind=main.engine, class_=TimedSession)
+
+    run = main.conversion_pool.run
+    async def timed_run(method, *args):
+        timings = request_timings.get()
+        started = time.perf_counter()
+        try:
+            return await run(method, *args)
+        finally:
+            if timings is not None:
+                timings["convert"] += time.perf_counter() - started
+    main.conversion_pool.run = timed_run
+
+    prime_stream = main.prime_stream
+    async def timed_prime_stream(chunks, *args, **kwargs):
+        timings = request_timings.get()
+        if timings is not None:
+            chunks = timed_chunks(chunks, timings)
+        return await prime_stream(chunks, *args, **kwargs)
+    main.prime_stream = timed_prime_stream
+
+# ============================================================================
+# LOAD GENERATION
+# ============================================================================
+
+def create_api_keys(plans: list) -> dict:
+    """One fresh user per plan (anonymous gets no key)"""
+    keys = {"anonymous": None}
+    db = main.SessionLocal()
+    try:
+        for plan in plans:
+            if plan == "anonymous":
+                continue
+            key = f"sk_{uuid.uuid4().hex[:32]}"
+            db.add(User(
+                email=f"loadtest-{plan}-{key[-8:]}@example.com",
+                api_key=key,
+                plan=plan,
+                conversions_limit=50 if plan == "free" else (500 if plan == "pro" else 999999)
+            ))
+            keys[plan] = key
+        db.commit()
+    finally:
+        db.close()
+    return keys
+
+def load_inputs(endpoints: list, sizes: list, shape: str, data_dir: Path, seed: int) -> dict:
+    """(source format, size label) → file bytes for every endpoint's source format"""
+    inputs = {}
+    for _, source, _ in endpoints:
+        for size_label, _ in sizes:
+            if (source, size_label) not in inputs:
+                path, _ = input_file(data_dir, source, shape, size_label, seed)
+                inputs[(source, size_label)] = (path.name, path.read_bytes())
+    return inputs
+
+def parse_endpoints(spec: str) -> list:
+    """'csv-to-json?stream=true,xml-to-csv' → [(name, source format, query params)]"""
+    endpoints = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        parts = urlsplit(item.strip())
+        source = parts.path.split("-to-")[0]
+        endpoints.append((item.strip(), source, dict(parse_qsl(parts.query))))
+    return endpoints
+
+async def virtual_user(client, rng, deadline, endpoints, sizes, plan, api_key, inputs, samples, think_time):
+    size_labels, size_weights = zip(*sizes)
+    while time.perf_counter() < deadline:
+        name, source, params = rng.choice(endpoints)
+        size_label = rng.choices(size_labels, size_weights)[0]
+        filename, content = inputs[(source, size_label)]
+        query = dict(params, api_key=api_key) if api_key else params
+        path = f"/api/v1/{name.split('?')[0]}"
+
+        # The ASGI transport runs the app in this task, so it sees these buckets
+        timings = {"db": 0.0, "convert": 0.0, "_active": False}
+        request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await client.post(path, params=query, files={"file": (filename, content)})
+            status = response.status_code
+            output_bytes = len(response.content)
+        except Exception as e:
+            status, output_bytes = type(e).__name__, 0
+        elapsed = time.perf_counter() - started
+
+        samples.append({
+            "endpoint": name,
+            "plan": plan,
+            "size": size_label,
+            "status": status,
+            "latency": elapsed,
+            "db": timings["db"],
+            "convert": timings["convert"],
+            "input_bytes": len(content),
+            "output_bytes": output_bytes
+        })
+        if think_time:
+            await asyncio.sleep(think_time)
+
+async def run_load(args) -> tuple:
+    """Run the virtual users; returns their samples and the seconds from the
+    first user starting to the last one finishing (setup excluded)"""
+    endpoints = parse_endpoints(args.endpoints)
+    sizes = parse_mix(args.sizes)
+    plans = parse_mix(args.plans)
+    unknown = [p for p, _ in plans if p not in PLANS]
+    if unknown:
+        raise SystemExit(f"Unknown plan(s): {', '.join(unknown)} (choose from {', '.join(PLANS)})")
+
+    inputs = load_inputs(endpoints, sizes, args.shape, Path(args.data_dir), args.seed)
+    instrument_app()
+    api_keys = create_api_keys([p for p, _ in plans])
+
+    rng = random.Random(args.seed)
+    plan_names, plan_weights = zip(*plans)
+    samples = []
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            deadline = time.perf_counter() + args.duration
+            users = []
+            for _ in range(args.users):
+                plan = rng.choices(plan_names, plan_weights)[0]
+                users.append(virtual_user(
+                    client, random.Random(rng.random()), deadline, endpoints, sizes,
+                    plan, api_keys[plan], inputs, samples, args.think_time
+                ))
+            print(f"🚀 {args.users} virtual users for {args.duration:.0f}s against {len(endpoints)} endpoint(s)")
+            started = time.perf_counter()
+            await asyncio.gather(*users)
+            duration = time.perf_counter() - started
+    return samples, duration
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def summarize(samples: list, duration: float) -> dict:
+    """Per-endpoint latency percentiles, throughput, error rate and time split"""
+    groups = {}
+    for sample in samples:
+        groups.setdefault(sample["endpoint"], []).append(sample)
+    groups["ALL"] = samples
+
+    summary = {}
+    for endpoint, group in groups.items():
+        latencies = sorted(s["latency"] for s in group)
+        errors = [s for s in group if s["status"] != 200]
+        total = sum(latencies) or 1e-9
+        statuses = {}
+        for s in group:
+            statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+        summary[endpoint] = {
+            "requests": len(group),
+            "throughput_rps": len(group) / duration,
+            "input_mb_per_s": sum(s["input_bytes"] for s in group) / (1024 * 1024) / duration,
+            "error_rate": len(errors) / len(group),
+            "statuses": statuses,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "mean_convert_ms": sum(s["convert"] for s in group) / len(group) * 1000,
+            "mean_db_ms": sum(s["db"] for s in group) / len(group) * 1000,
+            "convert_share": sum(s["convert"] for s in group) / total,
+            "db_share": sum(s["db"] for s in group) / total
+        }
+    return summary
+
+def print_summary(summary: dict):
+    print_section("📊 Results")
+    print(f"  {'endpoint':<28} {'reqs':>6} {'req/s':>8} {'err%':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+          f" {'convert':>9} {'db':>8}")
+    for endpoint, row in summary.items():
+        if endpoint == "ALL":
+            print("  " + "-" * 98)
+        print(
+            f"  {endpoint:<28} {row['requests']:>6} {row['throughput_rps']:>8.1f} {row['error_rate']:>6.1%}"
+            f" {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}"
+            f" {row['convert_share']:>9.1%} {row['db_share']:>8.1%}"
+        )
+    statuses = summary["ALL"]["statuses"]
+    print(f"\n  Status codes: {', '.join(f'{code} × {count}' for code, count in sorted(statuses.items()))}")
+    print("  convert / db = share of total request latency spent converting / in get_db session queries;")
+    print("  the rest is upload spooling, response streaming and waiting on other virtual users")
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description="In-process load test for the Data Converter API")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to run")
+    parser.add_argument("--endpoints", default=DEFAULT_ENDPOINTS,
+                        help="comma-separated, query params allowed, e.g. csv-to-json?stream=true")
+    parser.add_argument("--sizes", default="1KB:60,100KB:35,1MB:5", help="size:weight mix of uploads")
+    parser.add_argument("--plans", default="anonymous:25,free:25,pro:25,premium:25",
+                        help=f"plan:weight mix of virtual users ({', '.join(PLANS)})")
+    parser.add_argument("--shape", default="narrow", choices=SHAPES, help="shape of the generated inputs")
+    parser.add_argument("--think-time", type=float, default=0, help="seconds each user waits between requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=".bench_data", help="where generated inputs are cached")
+    parser.add_argument("--output", help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    samples, duration = asyncio.run(run_load(args))
+    if not samples:
+        print("⚠️  No requests completed")
+        return 1
+
+    summary = summarize(samples, duration)
+    print_summary(summary)
+    if args.output:
+        Path(args.output).write_text(json.dumps({"args": vars(args), "summary": summary}, indent=2))
+        print(f"\n💾 Summary written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -11,22 +11,57 @@ PAYPAL: $6.99/month (Pro) or $19.99/month (Premium)
 UPI: ₹499/month (Pro) or ₹1,499/month (Premium)
 """
 
+import asyncio
+import bz2
+import cProfile
 import csv
+import functools
+import gzip
+import hashlib
+import heapq
 import json
+import lzma
+import math
+import pstats
+import numpy as np
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import XMLGenerator
 import yaml
-import pandas as pd
+from openpyxl import Workbook
 import io
+import itertools
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
 import uuid
+import weakref
+import zipfile
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar, copy_context
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator, IO, Callable, Sequence
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Query
-from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, HTMLResponse
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, HTMLResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Boolean
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, DateTime, Float, Boolean
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
 from pydantic import BaseModel
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Gauge, Histogram, generate_latest, multiprocess
+)
 import os
 from dotenv import load_dotenv
 import logging
@@ -38,7 +73,43 @@ import logging
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./converter.db")
+CONVERTER_WORKERS = int(os.getenv("CONVERTER_WORKERS", os.cpu_count() or 1))  # 0 = run conversions in threads
+SPOOL_MAX_MEMORY = int(os.getenv("SPOOL_MAX_MEMORY", 8 * 1024 * 1024))  # bytes kept in RAM before spilling to disk
+
+# Hard upload size caps per plan (bytes); anonymous callers get the free cap
+PLAN_UPLOAD_LIMITS = {
+    "free": int(os.getenv("MAX_UPLOAD_MB_FREE", 100)) * 1024 * 1024,
+    "pro": int(os.getenv("MAX_UPLOAD_MB_PRO", 250)) * 1024 * 1024,
+    "premium": int(os.getenv("MAX_UPLOAD_MB_PREMIUM", 1024)) * 1024 * 1024,
+}
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Background conversion jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))  # 0 = run jobs in threads
+JOB_DIR = os.getenv("JOB_DIR", "./.conversion_jobs")
+JOB_RESULT_TTL_HOURS = int(os.getenv("JOB_RESULT_TTL_HOURS", 24))  # finished jobs' files are deleted after this
+
+# Admin-requested request profiles (profile=true), newest PROFILE_KEEP kept
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./.conversion_profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 50))
+
+# Conversion result cache (0 disables a tier)
+CACHE_DIR = os.getenv("CACHE_DIR", "./.conversion_cache")
+CACHE_MEMORY_BYTES = int(os.getenv("CACHE_MEMORY_MB", 64)) * 1024 * 1024
+CACHE_DISK_BYTES = int(os.getenv("CACHE_DISK_MB", 1024)) * 1024 * 1024  # shared by all workers
+# Part of every cache key; defaults to a hash of this file so a deploy that
+# changes the converters never serves results cached by the old code
+CACHE_VERSION = os.getenv("CACHE_VERSION") or hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+# ConversionLog rows are written behind the request, in bulk inserts of up
+# to FLUSH_ROWS rows at least every FLUSH_MS; past MAX_PENDING they're dropped
+CONVERSION_LOG_FLUSH_ROWS = int(os.getenv("CONVERSION_LOG_FLUSH_ROWS", 500))
+CONVERSION_LOG_FLUSH_MS = int(os.getenv("CONVERSION_LOG_FLUSH_MS", 1000))
+CONVERSION_LOG_MAX_PENDING = int(os.getenv("CONVERSION_LOG_MAX_PENDING", 100_000))
+# Cap on the decompressed size of .gz/.bz2/.xz uploads (compression bombs)
+DECOMPRESSED_MAX_BYTES = int(os.getenv("DECOMPRESSED_MAX_MB", 10 * 1024)) * 1024 * 1024
 API_KEY_REQUIRED = os.getenv("API_KEY_REQUIRED", "false").lower() == "true"
+# Log one JSON line of phase timings (as in Server-Timing) per conversion request
+TIMING_LOG = os.getenv("TIMING_LOG", "false").lower() == "true"
 
 # PAYPAL CONFIGURATION - REPLACE WITH YOUR DETAILS!
 PAYPAL_USERNAME = os.getenv("PAYPAL_USERNAME", "REPLACE_WITH_YOUR_PAYPAL_USERNAME")
@@ -53,6 +124,7 @@ Base = declarative_base()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger("converter.timing")
 
 # ============================================================================
 # DATABASE MODELS
@@ -91,6 +163,9 @@ class ConversionLog(Base):
     input_format = Column(String)
     output_format = Column(String)
     file_size = Column(Integer)
+    output_size = Column(Integer)
+    rows_processed = Column(Integer)
+    duration_ms = Column(Float)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
 class PremiumSubscription(Base):
@@ -134,8 +209,56 @@ class UPIPayment(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     confirmed_at = Column(DateTime, nullable=True)
 
+class ConversionJob(Base):
+    """Background conversion jobs for large files"""
+    __tablename__ = "conversion_jobs"
+    
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, nullable=True)
+    conversion_type = Column(String)
+    method = Column(String)
+    params = Column(String, default="[]")  # JSON-encoded converter arguments
+    output_format = Column(String)
+    status = Column(String, default="queued")  # queued, running, completed, failed, expired
+    input_size = Column(Integer, default=0)
+    rows_processed = Column(Integer, default=0)
+    bytes_out = Column(Integer, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    worker = Column(String, nullable=True)  # host:pid of the API process that queued it
+
+def add_missing_columns(model):
+    """Add columns a model gained after its table was created
+    
+    create_all() leaves existing tables alone. New columns are nullable,
+    so adding them is all it takes. Every gunicorn worker runs this at
+    import, so a column another worker added in the meantime is skipped
+    rather than failing startup.
+    """
+    table = model.__table__
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    missing = [column for column in table.columns if column.name not in existing]
+    added = []
+    for column in missing:
+        column_type = column.type.compile(dialect=engine.dialect)
+        try:
+            with engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+        except DBAPIError:
+            existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+            if column.name not in existing:
+                raise
+            continue
+        added.append(column.name)
+    if added:
+        logger.info(f"🗃️ Added {', '.join(added)} to {table.name}")
+
 # Create tables
 Base.metadata.create_all(bind=engine)
+add_missing_columns(ConversionLog)
+add_missing_columns(ConversionJob)
 
 # ============================================================================
 # PYDANTIC MODELS
@@ -152,6 +275,386 @@ class UserResponse(BaseModel):
     conversions_limit: int
     created_at: datetime
 
+# ============================================================================
+# METRICS
+# ============================================================================
+
+# Under gunicorn, gunicorn.conf.py points PROMETHEUS_MULTIPROC_DIR at a
+# directory shared by the workers and /metrics aggregates all of them
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTE_BUCKETS = tuple(1024 * 4 ** i for i in range(11))  # 1 KB … 1 GB
+ROW_BUCKETS = (1, 10, 100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+REQUEST_LATENCY = Histogram(
+    "converter_request_duration_seconds", "Conversion request latency, until the last byte is sent",
+    ["conversion", "status"], buckets=LATENCY_BUCKETS
+)
+INPUT_BYTES = Histogram(
+    "converter_input_bytes", "Request body size of successful conversions",
+    ["conversion"], buckets=BYTE_BUCKETS
+)
+OUTPUT_BYTES = Histogram(
+    "converter_output_bytes", "Response size of successful conversions (before compression)",
+    ["conversion"], buckets=BYTE_BUCKETS
+)
+ROWS_PROCESSED = Histogram(
+    "converter_rows_processed", "Records read from the input of successful conversions",
+    ["conversion"], buckets=ROW_BUCKETS
+)
+DB_SECONDS = Histogram(
+    "converter_db_seconds", "Time spent in API key, rate limit and billing queries",
+    ["conversion", "operation"], buckets=DB_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "converter_requests_in_flight", "Conversion requests being served",
+    ["conversion"], multiprocess_mode="livesum"
+)
+POOL_IN_FLIGHT = Gauge(
+    "converter_pool_in_flight", "Conversions running or waiting in the conversion pool",
+    multiprocess_mode="livesum"
+)
+
+# /api/v1/csv-to-json, /api/v1/batch/csv-to-json
+CONVERSION_PATH = re.compile(r"^/api/v1/(batch/)?([a-z]+)-to-([a-z]+)$")
+
+# Server-Timing phases, in header order. decode (decompressing the upload)
+# happens while converting, so it is also part of convert. send is the time
+# spent handing body chunks to the server, i.e. waiting on the client.
+TIMING_PHASES = ("read", "decode", "auth", "ratelimit", "convert", "billing", "serialize", "send")
+
+class RequestMetrics:
+    """Per-request counters filled in by code deep inside the conversion
+    
+    phases maps a TIMING_PHASES name to the nanoseconds spent in it so far.
+    """
+    __slots__ = ("conversion", "rows", "phases", "started", "user_id", "file_size")
+    
+    def __init__(self, conversion: Optional[str]):
+        self.conversion = conversion
+        self.rows = 0
+        self.phases = {}
+        self.started = time.perf_counter_ns()
+        self.user_id = None
+        self.file_size = 0
+    
+    def add_phase(self, name: str, nanoseconds: int):
+        self.phases[name] = self.phases.get(name, 0) + nanoseconds
+    
+    def merge(self, other: "RequestMetrics"):
+        """Fold in what a conversion worker counted"""
+        self.rows += other.rows
+        for name, nanoseconds in other.phases.items():
+            self.add_phase(name, nanoseconds)
+    
+    def server_timing(self) -> str:
+        """Server-Timing header value for the phases finished so far"""
+        entries = [
+            f"{name};dur={self.phases[name] / 1e6:.3f}"
+            for name in TIMING_PHASES if name in self.phases
+        ]
+        entries.append(f"total;dur={(time.perf_counter_ns() - self.started) / 1e6:.3f}")
+        return ", ".join(entries)
+
+# Set by MetricsMiddleware for the duration of a conversion request; the
+# streaming threadpool and response tasks inherit it
+request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+def count_rows(count: int):
+    """Add count input records to the current request's row count"""
+    metrics = request_metrics.get()
+    if metrics is not None:
+        metrics.rows += count
+
+def counted(records: Iterator[Any]) -> Iterator[Any]:
+    """Pass records through, counting them for the current request"""
+    metrics = request_metrics.get()
+    if metrics is None:
+        return records
+    return _count_records(records, metrics)
+
+def _count_records(records: Iterator[Any], metrics: RequestMetrics) -> Iterator[Any]:
+    for record in records:
+        metrics.rows += 1
+        yield record
+
+@contextmanager
+def uncounted():
+    """Stop count_rows counting in the block (a first pass over input that is read again)"""
+    token = request_metrics.set(None)
+    try:
+        yield
+    finally:
+        request_metrics.reset(token)
+
+@contextmanager
+def timed_phase(name: str):
+    """Charge the time spent in the block to the current request's phase"""
+    started = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        metrics = request_metrics.get()
+        if metrics is not None:
+            metrics.add_phase(name, time.perf_counter_ns() - started)
+
+def timed_chunks(chunks: Iterator, metrics: RequestMetrics) -> Iterator:
+    """Charge the time spent producing each chunk to the convert phase
+    
+    StreamingResponse pulls chunks from the threadpool, so the request's
+    metrics are bound here rather than looked up per chunk.
+    """
+    chunks = iter(chunks)
+    done = object()
+    while True:
+        started = time.perf_counter_ns()
+        chunk = next(chunks, done)
+        metrics.add_phase("convert", time.perf_counter_ns() - started)
+        if chunk is done:
+            return
+        yield chunk
+
+def timed_db(phase: str) -> Callable:
+    """Record how long an auth/billing helper spends (in DB queries) per call
+    
+    The time goes to the converter_db_seconds histogram and to the request's
+    Server-Timing phase.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter_ns() - started
+                metrics = request_metrics.get()
+                if metrics is not None:
+                    metrics.add_phase(phase, elapsed)
+                conversion = metrics.conversion if metrics is not None and metrics.conversion else "other"
+                DB_SECONDS.labels(conversion, func.__name__).observe(elapsed / 1e9)
+        return wrapper
+    return decorator
+
+def conversion_label(scope: dict) -> Optional[str]:
+    """csv_to_json-style label for a conversion request (None for anything else)
+    
+    Only known formats become labels, so arbitrary paths can't blow up the
+    number of time series.
+    """
+    path = scope["path"]
+    if path == "/api/v1/convert":
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        batch, source, target = "", query.get("from", [""])[0], query.get("to", [""])[0]
+    else:
+        match = CONVERSION_PATH.match(path)
+        if match is None:
+            return None
+        batch, source, target = match.groups()
+    formats = format_registry.formats
+    if source not in formats or target not in formats:
+        return "invalid"
+    return f"{'batch_' if batch else ''}{source}_to_{target}"
+
+class MetricsMiddleware:
+    """Records latency, sizes, rows and in-flight gauges of conversion requests
+    
+    Also adds a Server-Timing header with the phases done by the time the
+    response starts. For streamed results most of convert (and all of send,
+    writing the body out) comes later; TIMING_LOG=true logs the complete
+    breakdown when the request finishes.
+    
+    Pure ASGI, like CompressionMiddleware, and registered inside it so the
+    output size is the uncompressed conversion result. Requests that are not
+    conversions pass straight through.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        conversion = conversion_label(scope) if scope["type"] == "http" else None
+        if conversion is None:
+            await self.app(scope, receive, send)
+            return
+        
+        metrics = RequestMetrics(conversion)
+        token = request_metrics.set(metrics)
+        input_bytes = output_bytes = 0
+        status = 500
+        
+        async def counting_receive():
+            nonlocal input_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                input_bytes += len(message.get("body", b""))
+            return message
+        
+        async def counting_send(message):
+            nonlocal output_bytes, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", metrics.server_timing())
+                headers.append("Timing-Allow-Origin", "*")
+            elif message["type"] == "http.response.body":
+                output_bytes += len(message.get("body", b""))
+                started = time.perf_counter_ns()
+                await send(message)
+                metrics.add_phase("send", time.perf_counter_ns() - started)
+                return
+            await send(message)
+        
+        in_flight = REQUESTS_IN_FLIGHT.labels(conversion)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            in_flight.dec()
+            request_metrics.reset(token)
+            REQUEST_LATENCY.labels(conversion, str(status)).observe(time.perf_counter() - started)
+            if status == 200:
+                INPUT_BYTES.labels(conversion).observe(input_bytes)
+                OUTPUT_BYTES.labels(conversion).observe(output_bytes)
+                ROWS_PROCESSED.labels(conversion).observe(metrics.rows)
+                source, _, target = conversion.removeprefix("batch_").partition("_to_")
+                conversion_log.log(
+                    user_id=metrics.user_id,
+                    conversion_type=conversion,
+                    input_format=source,
+                    output_format=target,
+                    file_size=metrics.file_size or input_bytes,
+                    output_size=output_bytes,
+                    rows_processed=metrics.rows,
+                    duration_ms=round((time.perf_counter_ns() - metrics.started) / 1e6, 3),
+                    timestamp=datetime.utcnow()
+                )
+            if TIMING_LOG:
+                timing_logger.info(json.dumps({
+                    "event": "conversion_timing",
+                    "conversion": conversion,
+                    "path": scope["path"],
+                    "status": status,
+                    "total_ms": round((time.perf_counter_ns() - metrics.started) / 1e6, 3),
+                    "phases_ms": {
+                        name: round(metrics.phases[name] / 1e6, 3)
+                        for name in TIMING_PHASES if name in metrics.phases
+                    },
+                    "input_bytes": input_bytes,
+                    "output_bytes": output_bytes,
+                    "rows": metrics.rows
+                }))
+
+def metrics_registry() -> CollectorRegistry:
+    """This process's registry, or all workers' samples under gunicorn"""
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+# ============================================================================
+# REQUEST PROFILING
+# ============================================================================
+
+# True while a profile=true request runs: conversions then stay on the
+# profiled event loop thread instead of the worker pool and threadpool
+profiling: ContextVar[bool] = ContextVar("profiling", default=False)
+
+async def inline_chunks(chunks: Iterator) -> Any:
+    """Feed StreamingResponse from this thread rather than the threadpool"""
+    for chunk in chunks:
+        yield chunk
+
+async def run_blocking(function: Callable, *args) -> Any:
+    """Call a blocking function in the threadpool, or inline while profiling
+    (the profiler only sees the event loop's thread)"""
+    if profiling.get():
+        return function(*args)
+    return await run_in_threadpool(function, *args)
+
+def profile_path(profile_id: str, suffix: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}{suffix}")
+
+def save_profile(profile_id: str, profile: cProfile.Profile, info: dict):
+    """Write the stats and their description, dropping the oldest profiles
+    
+    Profiles live on disk so any gunicorn worker can serve them.
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile.dump_stats(profile_path(profile_id, ".pstats"))
+    with open(profile_path(profile_id, ".json"), "w") as f:
+        json.dump(info, f)
+    
+    saved = sorted(Path(PROFILE_DIR).glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for old in saved[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else []:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".pstats").unlink(missing_ok=True)
+
+class ProfilingMiddleware:
+    """Runs a conversion request under cProfile when an admin asks for it
+    
+    ?profile=true&admin_key=... on any conversion endpoint. The profile id
+    comes back in the X-Profile-Id header, and the stats are fetched from
+    /api/v1/admin/profiles/{id}. Profiles run one at a time; other requests
+    served by the event loop meanwhile show up in them too. Requests
+    without profile= only pay for a substring check.
+    """
+    
+    TRUE_VALUES = ("1", "true", "yes")
+    
+    def __init__(self, app):
+        self.app = app
+        self.lock = asyncio.Lock()
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or b"profile=" not in scope.get("query_string", b""):
+            await self.app(scope, receive, send)
+            return
+        
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        conversion = conversion_label(scope)
+        if query.get("profile", [""])[0].lower() not in self.TRUE_VALUES or conversion is None:
+            await self.app(scope, receive, send)
+            return
+        
+        if query.get("admin_key", [None])[0] != os.getenv("ADMIN_KEY", "YOUR-SECRET-ADMIN-KEY"):
+            response = JSONResponse(status_code=401, content={"status": "error", "detail": "Unauthorized", "status_code": 401})
+            await response(scope, receive, send)
+            return
+        
+        profile_id = uuid.uuid4().hex[:16]
+        status = 500
+        
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+        
+        async with self.lock:
+            token = profiling.set(True)
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                profile.disable()
+                profiling.reset(token)
+                info = {
+                    "id": profile_id,
+                    "conversion": conversion,
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "created_at": datetime.utcnow().isoformat()
+                }
+                await run_in_threadpool(save_profile, profile_id, profile, info)
+        logger.info(f"🔬 Profiled {scope['path']} in {info['duration_ms']:.0f} ms: {profile_id}")
+
 # ============================================================================
 # DEPENDENCY: Get DB Session
 # ============================================================================
@@ -168,6 +671,7 @@ def get_db():
 # DEPENDENCY: Verify API Key
 # ============================================================================
 
+@timed_db("auth")
 def verify_api_key(api_key: str = Query(None), db: Session = Depends(get_db)):
     """Verify API key - returns user or None if not required"""
     if not api_key:
@@ -179,6 +683,9 @@ def verify_api_key(api_key: str = Query(None), db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=401, detail="Invalid API key")
     
+    metrics = request_metrics.get()
+    if metrics is not None:
+        metrics.user_id = user.id
     return user
 
 # ============================================================================
@@ -203,11 +710,13 @@ def get_monthly_conversions(user_id: int, db: Session) -> int:
     ).count()
     return count
 
+@timed_db("billing")
 def get_free_conversions_left(user_id: int, db: Session) -> int:
     """Get remaining free conversions this month"""
     conversions_used = get_monthly_conversions(user_id, db)
     return max(0, 50 - conversions_used)
 
+@timed_db("billing")
 def charge_user(user_id: int, conversion_type: str, user_plan: str, db: Session) -> dict:
     """Charge user for conversion"""
     cost = get_conversion_cost(user_plan)
@@ -233,6 +742,32 @@ def charge_user(user_id: int, conversion_type: str, user_plan: str, db: Session)
             "message": "No charge (included in plan)"
         }
 
+@timed_db("billing")
+def charge_user_bulk(user_id: int, conversion_type: str, user_plan: str, count: int, db: Session) -> dict:
+    """Bill a batch of conversions with a single bulk insert
+    
+    Free conversions left this month are used first, as they are for
+    individual conversions.
+    """
+    free = min(count, get_free_conversions_left(user_id, db))
+    charged = count - free
+    cost = get_conversion_cost(user_plan)
+    
+    if charged and cost > 0:
+        db.add_all([
+            ConversionTransaction(user_id=user_id, conversion_type=conversion_type, amount=cost)
+            for _ in range(charged)
+        ])
+        db.commit()
+    else:
+        charged = 0
+    
+    return {
+        "charged": charged > 0,
+        "amount": round(charged * cost, 2),
+        "message": f"{free} free, {charged} charged"
+    }
+
 def get_user_monthly_bill(user_id: int, db: Session) -> dict:
     """Calculate user's monthly bill"""
     month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -261,14 +796,15 @@ def get_user_monthly_bill(user_id: int, db: Session) -> dict:
         "currency": "USD"
     }
 
-def check_rate_limit(user: Optional[User], db: Session):
-    """Check if user exceeded rate limit"""
+@timed_db("ratelimit")
+def check_rate_limit(user: Optional[User], db: Session, count: int = 1):
+    """Check if user exceeded rate limit (count conversions about to run)"""
     if not user:
         return True
     
     conversions = get_monthly_conversions(user.id, db)
     
-    if user.plan == "pro" and conversions >= 500:
+    if user.plan == "pro" and conversions + count > 500:
         raise HTTPException(status_code=429, detail="Pro limit (500/month) reached. Upgrade to Premium!")
     
     return True
@@ -277,193 +813,2426 @@ def check_rate_limit(user: Optional[User], db: Session):
 # DATA CONVERTER SERVICE
 # ============================================================================
 
+# json.dumps separators keyed on "compact output requested"
+JSON_SEPARATORS = {False: (",", ": "), True: (",", ":")}
+
+# csv-to-sql quoting rules
+SQL_DIALECTS = ("sqlite", "postgres", "mysql")
+
+# Rows per multi-row INSERT unless batch_size says otherwise
+SQL_BATCH_SIZE = 500
+
+# Compressed uploads are recognised by their leading magic bytes
+DECOMPRESSORS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz")
+
+# Streaming writers hand on output in chunks of about this many characters
+STREAM_FLUSH_SIZE = 64 * 1024
+
+# Excel's hard per-sheet row limit
+XLSX_MAX_ROWS = 1048576
+
+# csv-to-xlsx stores fields matching these as numbers, like pandas did, but
+# cell by cell rather than per column, and integers longer than Excel's 15
+# digits of precision (IDs, card numbers) stay text
+INT_PATTERN = re.compile(r"-?\d+$")
+EXCEL_MAX_DIGITS = 15
+FLOAT_PATTERN = re.compile(r"-?(\d+\.\d*|\.\d+|\d+)([eE][-+]?\d+)?$")
+
+# PyYAML's libyaml bindings are several times faster than the pure-Python
+# loader/dumper; fall back transparently when PyYAML was built without them
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+    YAML_BACKEND = "libyaml"
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+    YAML_BACKEND = "python"
+
+# Rows per RowBatch on the tabular (CSV/XLSX/SQL) paths
+ROW_BATCH_SIZE = 1000
+
+# infer_types column kinds → CREATE TABLE column types per dialect
+SQL_COLUMN_TYPES = {
+    "sqlite": {"null": "TEXT", "bool": "INTEGER", "int": "INTEGER", "float": "REAL", "date": "TEXT", "str": "TEXT"},
+    "postgres": {"null": "TEXT", "bool": "BOOLEAN", "int": "BIGINT", "float": "DOUBLE PRECISION", "date": "DATE", "str": "TEXT"},
+    "mysql": {"null": "TEXT", "bool": "BOOLEAN", "int": "BIGINT", "float": "DOUBLE", "date": "DATE", "str": "TEXT"},
+}
+
+class RowBatch:
+    """A run of tabular rows sharing one header
+    
+    Rows are kept as the sequences the CSV reader produced (or tuples
+    built from records), so wide files don't pay for a dict per row with
+    every header string hashed again.
+    """
+    
+    __slots__ = ("header", "rows", "kinds")
+    
+    def __init__(self, header: Tuple[str, ...], rows: List[Sequence[Any]],
+                 kinds: Optional[List[str]] = None):
+        self.header = header
+        self.rows = rows
+        self.kinds = kinds  # per-column inferred kinds, once typed
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def columns(self) -> List[np.ndarray]:
+        """Column arrays of the raw text fields (short rows padded with "")"""
+        width = len(self.header)
+        rows = [
+            row if len(row) == width else list(row) + [""] * (width - len(row))
+            for row in self.rows
+        ]
+        if not rows:
+            return [np.array([], dtype=str) for _ in range(width)]
+        return [np.array(column, dtype=str) for column in zip(*rows)]
+    
+    def records(self) -> Iterator[dict]:
+        """Rows as dicts keyed by the header, as csv.DictReader builds them
+        
+        Fields missing from short rows are None and the extra fields of
+        long rows are listed under the None key.
+        """
+        header = self.header
+        width = len(header)
+        for row in self.rows:
+            record = dict(zip(header, row))
+            if len(row) < width:
+                record.update(dict.fromkeys(header[len(row):]))
+            elif len(row) > width:
+                record[None] = list(row[width:])
+            yield record
+
+class DecompressedReader(io.RawIOBase):
+    """Raw reader over a decompressing stream that stops at a size cap"""
+    
+    def __init__(self, stream: IO[bytes], limit: int):
+        self.stream = stream
+        self.limit = limit
+        self.size = 0
+        self.metrics = request_metrics.get()
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        started = time.perf_counter_ns()
+        size = self.stream.readinto(buffer)
+        if self.metrics is not None:
+            self.metrics.add_phase("decode", time.perf_counter_ns() - started)
+        self.size += size
+        if self.size > self.limit:
+            raise ValueError(f"Decompressed input exceeds {self.limit // (1024 * 1024)} MB")
+        return size
+    
+    def close(self):
+        self.stream.close()
+        super().close()
+
 class DataConverter:
     """Main converter class - all 5 formats"""
     
     @staticmethod
-    def csv_to_json(csv_content: str) -> str:
+    def open_source(content: Any) -> IO:
+        """Open converter input as a stream
+        
+        Input may be a string, bytes, a path to a spooled upload (so it can
+        be handed to worker processes) or an already open file-like object.
+        gzip, bz2 and xz input is decompressed on the fly.
+        """
+        if isinstance(content, str):
+            return io.StringIO(content)
+        if isinstance(content, bytes):
+            content = io.BytesIO(content)
+        elif isinstance(content, os.PathLike):
+            content = open(content, "rb")
+        return DataConverter.decompress(content)
+    
+    @staticmethod
+    def compression_of(head: bytes) -> Optional[str]:
+        """gzip/bz2/xz from a stream's first bytes, or None if uncompressed"""
+        if head.startswith(b"\x1f\x8b"):
+            return "gzip"
+        if head.startswith(b"BZh") and head[3:4].isdigit() and head[3:4] != b"0":
+            return "bz2"
+        if head.startswith(b"\xfd7zXZ\x00"):
+            return "xz"
+        return None
+    
+    @staticmethod
+    def decompress(stream: IO) -> IO:
+        """Wrap a gzip/bz2/xz binary stream so it reads decompressed"""
+        if isinstance(stream, io.TextIOBase):
+            return stream
+        if stream.seekable():
+            position = stream.tell()
+            head = stream.read(6)
+            stream.seek(position)
+        else:
+            if not hasattr(stream, "peek"):
+                stream = io.BufferedReader(stream)
+            head = stream.peek(6)[:6]
+        
+        method = DataConverter.compression_of(head) if isinstance(head, bytes) else None
+        if method is None:
+            return stream
+        reader = DecompressedReader(DECOMPRESSORS[method](stream, "rb"), DECOMPRESSED_MAX_BYTES)
+        return io.BufferedReader(reader)
+    
+    @staticmethod
+    def text_stream(content: Any) -> io.TextIOBase:
+        """Open converter input as a UTF-8 text stream"""
+        content = DataConverter.open_source(content)
+        if isinstance(content.read(0), bytes):
+            return io.TextIOWrapper(content, encoding="utf-8")
+        return content
+    
+    @staticmethod
+    def csv_to_json(csv_content: Any, indent: Optional[int] = 2, infer_types: bool = False) -> str:
         """CSV → JSON"""
-        reader = csv.DictReader(io.StringIO(csv_content))
-        data = list(reader)
-        return json.dumps(data, indent=2)
+        data = list(DataConverter.csv_rows(csv_content, infer_types))
+        return json.dumps(data, indent=indent, separators=JSON_SEPARATORS[indent is None],
+                          default=DataConverter.json_default)
+    
+    @staticmethod
+    def json_default(value: Any) -> Any:
+        """json.dumps fallback: dates (from YAML or infer_types) as ISO strings"""
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    
+    @staticmethod
+    def csv_rows(csv_content: Any, infer_types: bool = False) -> Iterator[dict]:
+        """CSV rows as dicts keyed by the header, typed when infer_types is set"""
+        batches = DataConverter.csv_typed_batches(csv_content, infer_types)
+        return (record for batch in batches for record in batch.records())
+    
+    @staticmethod
+    def coalesce(pieces: Iterator[str], size: int = STREAM_FLUSH_SIZE) -> Iterator[str]:
+        """Join small pieces of output into chunks of about size characters
+        
+        Each chunk handed to the response costs a threadpool hop and a
+        send(), so per-record pieces are far too small to yield directly.
+        """
+        buffer = []
+        buffered = 0
+        for piece in pieces:
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered >= size:
+                yield "".join(buffer)
+                buffer = []
+                buffered = 0
+        if buffer:
+            yield "".join(buffer)
+    
+    @staticmethod
+    def json_array_stream(records: Iterator[Any]) -> Iterator[str]:
+        """Serialize records as a JSON array, in chunks of whole elements"""
+        def pieces():
+            yield "["
+            separator = "\n"
+            for record in records:
+                yield separator + json.dumps(record, default=DataConverter.json_default)
+                separator = ",\n"
+            yield "\n]" if separator != "\n" else "]"
+        return DataConverter.coalesce(pieces())
+    
+    @staticmethod
+    def ndjson_stream(records: Iterator[Any]) -> Iterator[str]:
+        """Serialize records as newline-delimited JSON, in chunks of whole lines"""
+        default = DataConverter.json_default
+        return DataConverter.coalesce(json.dumps(record, default=default) + "\n" for record in records)
+    
+    @staticmethod
+    def csv_to_json_stream(csv_content: Any, infer_types: bool = False) -> Iterator[str]:
+        """CSV → JSON, yielded in chunks of whole array elements"""
+        return DataConverter.json_array_stream(DataConverter.csv_rows(csv_content, infer_types))
+    
+    @staticmethod
+    def xml_text(value: Any) -> Optional[str]:
+        """Element text for a field (missing values give an empty element)"""
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return str(value)
+    
+    @staticmethod
+    def xml_writer() -> Tuple[io.StringIO, XMLGenerator]:
+        """An XMLGenerator writing into a buffer that the caller drains"""
+        output = io.StringIO()
+        return output, XMLGenerator(output, short_empty_elements=True)
+    
+    @staticmethod
+    def drain(output: io.StringIO) -> str:
+        chunk = output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+        return chunk
+    
+    @staticmethod
+    def csv_to_xml_stream(csv_content: Any, root_name: str = "data", infer_types: bool = False) -> Iterator[str]:
+        """CSV → XML, written incrementally one <item> per row
+        
+        Works on the RowBatch rows directly: element names are worked out
+        once per column rather than a dict being built for every row.
+        Repeated column names keep the last value, as a dict would.
+        """
+        output, xml = DataConverter.xml_writer()
+        xml.startElement(root_name, {})
+        batches = DataConverter.csv_typed_batches(csv_content, infer_types)
+        xml_text = DataConverter.xml_text
+        columns = None
+        row_number = 0
+        
+        for batch in batches:
+            if columns is None:
+                width = len(batch.header)
+                positions = {}
+                for index, key in enumerate(batch.header):
+                    positions[key] = index
+                columns = [(key.lower().replace(" ", "_"), index) for key, index in positions.items()]
+            for row in batch.rows:
+                row_number += 1
+                if len(row) > width:
+                    raise ValueError(f"Row {row_number} has more fields than the header")
+                xml.startElement("item", {})
+                for tag, index in columns:
+                    xml.startElement(tag, {})
+                    text = xml_text(row[index]) if index < len(row) else None
+                    if text:
+                        xml.characters(text)
+                    xml.endElement(tag)
+                xml.endElement("item")
+            if output.tell() >= STREAM_FLUSH_SIZE:
+                yield DataConverter.drain(output)
+        
+        xml.endElement(root_name)
+        yield DataConverter.drain(output)
     
     @staticmethod
-    def csv_to_xml(csv_content: str, root_name: str = "data") -> str:
+    def csv_to_xml(csv_content: Any, root_name: str = "data", infer_types: bool = False) -> str:
         """CSV → XML"""
-        reader = csv.DictReader(io.StringIO(csv_content))
-        root = ET.Element(root_name)
+        return "".join(DataConverter.csv_to_xml_stream(csv_content, root_name, infer_types))
+    
+    @staticmethod
+    def csv_to_yaml(csv_content: Any, infer_types: bool = False) -> str:
+        """CSV → YAML"""
+        data = list(DataConverter.csv_rows(csv_content, infer_types))
+        return yaml.dump(data, Dumper=YamlDumper, default_flow_style=False)
+    
+    @staticmethod
+    def sql_identifier(name: str, dialect: str = "sqlite") -> str:
+        """Quote a table/column name for the target SQL dialect"""
+        if dialect == "mysql":
+            return "`" + name.replace("`", "``") + "`"
+        return '"' + name.replace('"', '""') + '"'
+    
+    @staticmethod
+    def sql_table_name(name: str, dialect: str = "sqlite") -> str:
+        """Quote a table name, each part of a schema-qualified one separately"""
+        parts = name.split(".")
+        if not all(parts):
+            raise ValueError(f"Invalid table name '{name}'")
+        return ".".join(DataConverter.sql_identifier(part, dialect) for part in parts)
+    
+    @staticmethod
+    def sql_literal(value: Optional[str], dialect: str = "sqlite") -> str:
+        """Quote a CSV field as a SQL string literal for the target dialect"""
+        if value is None:
+            return "NULL"
+        if dialect == "mysql":
+            value = value.replace("\\", "\\\\")
+        return "'" + value.replace("'", "''") + "'"
+    
+    @staticmethod
+    def sql_value(value: Any, dialect: str = "sqlite") -> str:
+        """Render a record value as a SQL literal (numbers bare, nested values as JSON text)"""
+        if value is None:
+            return "NULL"
+        if isinstance(value, bool):
+            if dialect == "sqlite":
+                return "1" if value else "0"
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, (int, float)):
+            return repr(value) if math.isfinite(value) else "NULL"
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        return DataConverter.sql_literal(str(value), dialect)
+    
+    @staticmethod
+    def csv_batches(csv_content: Any, batch_size: int = ROW_BATCH_SIZE) -> Iterator[RowBatch]:
+        """Read CSV as RowBatches of raw rows (blank lines skipped)
+        
+        A header-only file still yields one empty batch so writers can emit
+        the header.
+        """
+        reader = csv.reader(DataConverter.text_stream(csv_content))
+        header = next(reader, None)
+        if header is None:
+            return
+        header = tuple(header)
         
+        rows = []
+        emitted = False
         for row in reader:
-            item = ET.SubElement(root, "item")
-            for key, value in row.items():
-                child = ET.SubElement(item, key.lower().replace(" ", "_"))
-                child.text = str(value)
+            if not row:
+                continue
+            rows.append(row)
+            if len(rows) >= batch_size:
+                count_rows(len(rows))
+                yield RowBatch(header, rows)
+                rows = []
+                emitted = True
+        if rows or not emitted:
+            count_rows(len(rows))
+            yield RowBatch(header, rows)
+    
+    @staticmethod
+    def record_batches(records: Iterator[Any], batch_size: int = ROW_BATCH_SIZE) -> Iterator[RowBatch]:
+        """Group dict records into RowBatches keyed by the first record's fields
         
-        return ET.tostring(root, encoding="unicode")
+        Missing fields become None; fields the first record lacks are an
+        error, as with csv.DictWriter.
+        """
+        header = None
+        fields = None
+        rows = []
+        for record in records:
+            if header is None:
+                header = tuple(record.keys())
+                fields = set(header)
+            if len(record) > len(header) or record.keys() - fields:
+                extra = ", ".join(repr(key) for key in record.keys() - fields)
+                raise ValueError(f"dict contains fields not in fieldnames: {extra}")
+            rows.append(tuple(map(record.get, header)))
+            if len(rows) >= batch_size:
+                yield RowBatch(header, rows)
+                rows = []
+        if rows:
+            yield RowBatch(header, rows)
     
     @staticmethod
-    def csv_to_yaml(csv_content: str) -> str:
-        """CSV → YAML"""
-        reader = csv.DictReader(io.StringIO(csv_content))
-        data = list(reader)
-        return yaml.dump(data, default_flow_style=False)
+    def _cast(values: np.ndarray, dtype: Any) -> Optional[np.ndarray]:
+        try:
+            return values.astype(dtype)
+        except (ValueError, OverflowError, TypeError):
+            return None
     
     @staticmethod
-    def csv_to_sql(csv_content: str, table_name: str = "data") -> str:
-        """CSV → SQL INSERT statements"""
-        reader = csv.DictReader(io.StringIO(csv_content))
-        sql_statements = []
+    def infer_kind(column: np.ndarray) -> str:
+        """Classify a text column as null/bool/int/float/date/str
         
-        rows = list(reader)
-        if not rows:
-            return ""
+        Each check runs over the whole array at once. Only canonical forms
+        count (no "007", "+5" or "1_000" ints, no NaN/inf floats, only
+        YYYY-MM-DD dates), so typing never changes what a value means.
+        """
+        values = column[column != ""]
+        if values.size == 0:
+            return "null"
+        
+        # Every typed form is plain ASCII without spaces or underscores
+        codes = values.view(np.uint32)
+        if codes.max() > 127 or (codes[codes != 0] <= 32).any() or (codes == ord("_")).any():
+            return "str"
+        
+        # float() accepts these, but the number would be written back
+        # differently ("+5" → 5.0, "-0" → 0)
+        if np.char.startswith(values, "+").any() or (values == "-0").any():
+            return "str"
+        
+        lengths = np.char.str_len(values)
+        if ((lengths == 4) | (lengths == 5)).all() and np.isin(np.char.lower(values), ("true", "false")).all():
+            return "bool"
         
-        for row in rows:
-            columns = ", ".join(row.keys())
-            values = ", ".join([f"'{v.replace(chr(39), chr(92)+chr(39))}'" for v in row.values()])
-            sql = f"INSERT INTO {table_name} ({columns}) VALUES ({values});"
-            sql_statements.append(sql)
+        digits = np.char.lstrip(values, "-")
+        digit_lengths = np.char.str_len(digits)
+        leading_zero = np.char.startswith(digits, "0") & (digit_lengths > 1)
+        if (np.char.isdigit(digits) & (lengths - digit_lengths <= 1)).all():
+            # int64-sized canonical integers; zero-padded codes stay text
+            if leading_zero.any() or digit_lengths.max() > 18:
+                return "str"
+            return "int"
         
-        return "\n".join(sql_statements)
+        floats = DataConverter._cast(values, np.float64)
+        if floats is not None and np.isfinite(floats).all():
+            if not (leading_zero & ~np.char.startswith(digits, "0.")).any():
+                return "float"
+        
+        if (lengths == 10).all():
+            dates = DataConverter._cast(values, "datetime64[D]")
+            if dates is not None and (dates.astype(str) == values).all():
+                return "date"
+        return "str"
     
     @staticmethod
-    def csv_to_xlsx(csv_content: str) -> bytes:
-        """CSV → Excel XLSX"""
-        df = pd.read_csv(io.StringIO(csv_content))
-        output = io.BytesIO()
-        df.to_excel(output, index=False, engine='openpyxl')
-        output.seek(0)
-        return output.getvalue()
+    def merge_kinds(current: str, seen: str) -> str:
+        """Widen a column's kind to cover a new batch"""
+        if current == seen or seen == "null":
+            return current
+        if current == "null":
+            return seen
+        if {current, seen} == {"int", "float"}:
+            return "float"
+        return "str"
     
     @staticmethod
-    def json_to_csv(json_content: str) -> str:
-        """JSON → CSV"""
-        data = json.loads(json_content)
-        if not isinstance(data, list):
-            data = [data]
+    def typed_column(column: np.ndarray, kind: str) -> List[Any]:
+        """Convert a text column to Python values of the given kind ("" → None)"""
+        if kind == "str":
+            return column.tolist()
+        if kind == "null":
+            return [None] * column.size
         
-        if not data:
-            return ""
+        present = column != ""
+        values = column[present]
+        if kind == "bool":
+            typed = (np.char.lower(values) == "true").tolist()
+        elif kind == "int":
+            typed = list(map(int, values.tolist()))
+        elif kind == "float":
+            typed = list(map(float, values.tolist()))
+        else:
+            typed = values.astype("datetime64[D]").astype(object).tolist()
         
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
+        if values.size == column.size:
+            return typed
+        result = np.full(column.size, None, dtype=object)
+        result[present] = typed
+        return result.tolist()
+    
+    @staticmethod
+    def infer_kinds(batches: Iterator[RowBatch]) -> Optional[List[str]]:
+        """Column kinds covering every batch (None when there are no batches)"""
+        kinds = None
+        for batch in batches:
+            if kinds is None:
+                kinds = ["null"] * len(batch.header)
+            kinds = [
+                DataConverter.merge_kinds(kind, DataConverter.infer_kind(column))
+                for kind, column in zip(kinds, batch.columns())
+            ]
+        return kinds
+    
+    @staticmethod
+    def csv_kinds(csv_content: Any) -> Tuple[Any, Optional[List[str]]]:
+        """Infer column kinds over a whole CSV input in a first pass
+        
+        Returns the input ready to be read again along with the kinds. An
+        open stream is rewound afterwards (a non-seekable one is spooled to
+        a temporary file first); rows aren't counted until the second pass.
+        """
+        if not hasattr(csv_content, "read"):
+            with uncounted():
+                return csv_content, DataConverter.infer_kinds(DataConverter.csv_batches(csv_content))
         
-        return output.getvalue()
+        if not csv_content.seekable():
+            spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+            shutil.copyfileobj(csv_content, spool)
+            spool.seek(0)
+            csv_content = spool
+        start = csv_content.tell()
+        text = DataConverter.text_stream(csv_content)
+        with uncounted():
+            kinds = DataConverter.infer_kinds(DataConverter.csv_batches(text))
+        if text is not csv_content and isinstance(text, io.TextIOWrapper):
+            text.detach()  # collecting the wrapper would close csv_content
+        csv_content.seek(start)
+        return csv_content, kinds
     
     @staticmethod
-    def json_to_xml(json_content: str, root_name: str = "data") -> str:
-        """JSON → XML"""
-        data = json.loads(json_content)
-        root = ET.Element(root_name)
-        
-        def build_xml(parent, data):
-            if isinstance(data, list):
-                for item in data:
-                    elem = ET.SubElement(parent, "item")
-                    build_xml(elem, item)
-            elif isinstance(data, dict):
-                for key, value in data.items():
-                    child = ET.SubElement(parent, key)
-                    if isinstance(value, (dict, list)):
-                        build_xml(child, value)
-                    else:
-                        child.text = str(value)
-            else:
-                parent.text = str(data)
+    def csv_typed_batches(csv_content: Any, infer_types: bool = False) -> Iterator[RowBatch]:
+        """csv_batches, typed when infer_types is set
         
-        build_xml(root, data)
-        return ET.tostring(root, encoding="unicode")
+        Typing reads the input twice: csv_kinds settles every column's kind
+        over all rows first, so a column keeps one type from the first row
+        to the last (and a typed CREATE TABLE can come before the rows).
+        """
+        if not infer_types:
+            yield from DataConverter.csv_batches(csv_content)
+            return
+        csv_content, kinds = DataConverter.csv_kinds(csv_content)
+        yield from DataConverter.typed_batches(DataConverter.csv_batches(csv_content), kinds)
     
     @staticmethod
-    def json_to_yaml(json_content: str) -> str:
-        """JSON → YAML"""
-        data = json.loads(json_content)
-        return yaml.dump(data, default_flow_style=False)
+    def typed_batches(batches: Iterator[RowBatch], kinds: Optional[List[str]]) -> Iterator[RowBatch]:
+        """Convert the rows of each batch to typed values
+        
+        kinds come from infer_kinds over the whole input (None only when it
+        had no batches); batch.kinds records them on each batch.
+        """
+        row_number = 0
+        for batch in batches:
+            width = len(batch.header)
+            for row in batch.rows:
+                row_number += 1
+                if len(row) > width:
+                    raise ValueError(f"Row {row_number} has more fields than the header")
+            
+            columns = batch.columns()
+            typed = [DataConverter.typed_column(column, kind) for column, kind in zip(columns, kinds)]
+            rows = list(zip(*typed)) if width else [()] * len(batch)
+            yield RowBatch(batch.header, rows, list(kinds))
     
     @staticmethod
-    def xml_to_json(xml_content: str) -> str:
-        """XML → JSON"""
-        root = ET.fromstring(xml_content)
-        
-        def elem_to_dict(elem):
-            result = {}
-            for child in elem:
-                child_data = elem_to_dict(child)
-                if child.tag in result:
-                    if not isinstance(result[child.tag], list):
-                        result[child.tag] = [result[child.tag]]
-                    result[child.tag].append(child_data)
-                else:
-                    result[child.tag] = child_data
+    def batches_to_csv_stream(batches: Iterator[RowBatch]) -> Iterator[str]:
+        """Write RowBatches as CSV, in chunks of whole rows"""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        started = False
+        
+        for batch in batches:
+            if not started:
+                writer.writerow(batch.header)
+                started = True
+            writer.writerows(batch.rows)
+            if output.tell() >= STREAM_FLUSH_SIZE:
+                yield DataConverter.drain(output)
+        
+        if started:
+            yield DataConverter.drain(output)
+    
+    @staticmethod
+    def sql_create_table(table: str, header: Sequence[str], kinds: List[str], dialect: str = "sqlite") -> str:
+        """CREATE TABLE statement with column types from inferred kinds"""
+        types = SQL_COLUMN_TYPES[dialect]
+        columns = ",\n".join(
+            f"  {DataConverter.sql_identifier(name, dialect)} {types[kind]}"
+            for name, kind in zip(header, kinds)
+        )
+        return f"CREATE TABLE {table} (\n{columns}\n);\n"
+    
+    @staticmethod
+    def batches_to_sql_stream(batches: Iterator[RowBatch], table_name: str = "data",
+                              batch_size: int = SQL_BATCH_SIZE, dialect: str = "sqlite") -> Iterator[str]:
+        """Write RowBatches as INSERT statements, in chunks of whole statements
+        
+        Each statement inserts up to batch_size rows with a single
+        multi-row VALUES list. Short rows are padded with NULLs. Typed
+        batches are preceded by a CREATE TABLE using the first batch's
+        column kinds, so they should be typed with kinds that hold for the
+        whole input (see csv_typed_batches).
+        """
+        return DataConverter.coalesce(DataConverter._sql_statements(batches, table_name, batch_size, dialect))
+    
+    @staticmethod
+    def _sql_statements(batches: Iterator[RowBatch], table_name: str, batch_size: int, dialect: str) -> Iterator[str]:
+        """Yield the statements for batches_to_sql_stream one at a time"""
+        if dialect not in SQL_DIALECTS:
+            raise ValueError(f"Unsupported SQL dialect '{dialect}'")
+        
+        insert = None
+        values = []
+        row_number = 0
+        sql_value = DataConverter.sql_value
+        if dialect == "mysql":
+            quote = lambda v: "'" + v.replace("\\", "\\\\").replace("'", "''") + "'"
+        else:
+            quote = lambda v: "'" + v.replace("'", "''") + "'"
+        
+        def column_renderer(kind: str) -> Callable[[Any], str]:
+            # Typed columns are rendered by kind instead of per-value checks
+            if kind in ("int", "float"):
+                return lambda v: "NULL" if v is None else repr(v)
+            if kind == "str":
+                return quote
+            return lambda v: sql_value(v, dialect)
+        
+        for batch in batches:
+            if insert is None:
+                header = batch.header
+                width = len(header)
+                padding = (None,) * width
+                table = DataConverter.sql_table_name(table_name, dialect)
+                columns = ", ".join(DataConverter.sql_identifier(name, dialect) for name in header)
+                insert = f"INSERT INTO {table} ({columns}) VALUES "
+                if batch.kinds is not None:
+                    yield DataConverter.sql_create_table(table, header, batch.kinds, dialect)
+            
+            renderers = None
+            if batch.kinds is not None:
+                renderers = [column_renderer(kind) for kind in batch.kinds]
             
-            if not result:
-                return elem.text
-            return result
+            for row in batch.rows:
+                row_number += 1
+                if renderers is not None:
+                    values.append("(" + ", ".join([render(v) for render, v in zip(renderers, row)]) + ")")
+                else:
+                    if len(row) != width:
+                        if len(row) > width:
+                            raise ValueError(f"Row {row_number} has more fields than the header")
+                        row = tuple(row) + padding[len(row):]
+                    values.append("(" + ", ".join([
+                        quote(v) if v.__class__ is str else sql_value(v, dialect) for v in row
+                    ]) + ")")
+                if len(values) >= batch_size:
+                    yield insert + ",\n".join(values) + ";\n"
+                    values = []
         
-        data = elem_to_dict(root)
-        return json.dumps(data, indent=2)
+        if values:
+            yield insert + ",\n".join(values) + ";\n"
     
     @staticmethod
-    def xml_to_csv(xml_content: str) -> str:
-        """XML → CSV (flattened)"""
-        root = ET.fromstring(xml_content)
-        rows = []
+    def csv_to_sql_stream(csv_content: Any, table_name: str = "data", batch_size: int = SQL_BATCH_SIZE,
+                          dialect: str = "sqlite", infer_types: bool = False) -> Iterator[str]:
+        """CSV → SQL INSERT statements (after a typed CREATE TABLE with infer_types)"""
+        if dialect not in SQL_DIALECTS:
+            raise ValueError(f"Unsupported SQL dialect '{dialect}'")
+        batches = DataConverter.csv_typed_batches(csv_content, infer_types)
+        return DataConverter.batches_to_sql_stream(batches, table_name, batch_size, dialect)
+    
+    @staticmethod
+    def csv_to_sql(csv_content: Any, table_name: str = "data", batch_size: int = SQL_BATCH_SIZE,
+                   dialect: str = "sqlite", infer_types: bool = False) -> str:
+        """CSV → SQL INSERT statements"""
+        return "".join(DataConverter.csv_to_sql_stream(csv_content, table_name, batch_size, dialect, infer_types))
+    
+    @staticmethod
+    def xlsx_cell(value: Any) -> Any:
+        """Store numeric text as numbers, empty text as blanks and nested values as JSON"""
+        if isinstance(value, str):
+            if not value:
+                return None
+            if INT_PATTERN.match(value):
+                return int(value) if len(value.lstrip("-")) <= EXCEL_MAX_DIGITS else value
+            if FLOAT_PATTERN.match(value):
+                return float(value)
+            return value
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        return value
+    
+    @staticmethod
+    def batches_to_xlsx_stream(batches: Iterator[RowBatch]) -> Iterator[bytes]:
+        """Write RowBatches to XLSX with a write-only workbook
         
-        for item in root.findall(".//item"):
-            row = {}
-            for child in item:
-                row[child.tag] = child.text
-            if row:
-                rows.append(row)
+        Rows past Excel's sheet limit continue on a new sheet that repeats
+        the header row. Nothing is yielded until the whole workbook has been
+        built and saved (it is spooled to disk and yielded in chunks), so
+        the endpoints run it in the conversion pool via convert_to_file.
+        """
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Sheet1")
+        sheet_rows = 0
+        header = None
+        cell = DataConverter.xlsx_cell
         
-        if not rows:
-            return ""
+        for batch in batches:
+            if header is None:
+                header = list(batch.header)
+                sheet.append(header)
+                sheet_rows = 1
+            for row in batch.rows:
+                if sheet_rows == XLSX_MAX_ROWS:
+                    sheet = workbook.create_sheet(f"Sheet{len(workbook.worksheets) + 1}")
+                    sheet.append(header)
+                    sheet_rows = 1
+                # Typed batches already hold the values to store
+                sheet.append(row if batch.kinds is not None else [cell(value) for value in row])
+                sheet_rows += 1
         
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=rows[0].keys())
-        writer.writeheader()
-        writer.writerows(rows)
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as output:
+            workbook.save(output)
+            output.seek(0)
+            while True:
+                chunk = output.read(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+    
+    @staticmethod
+    def csv_to_xlsx_stream(csv_content: Any, infer_types: bool = False) -> Iterator[bytes]:
+        """CSV → Excel XLSX, written row by row"""
+        return DataConverter.batches_to_xlsx_stream(DataConverter.csv_typed_batches(csv_content, infer_types))
+    
+    @staticmethod
+    def csv_to_xlsx(csv_content: Any, infer_types: bool = False) -> bytes:
+        """CSV → Excel XLSX"""
+        return b"".join(DataConverter.csv_to_xlsx_stream(csv_content, infer_types))
+    
+    @staticmethod
+    def iter_json_array(json_content: Any, chunk_size: int = 64 * 1024) -> Tuple[bool, Iterator[Any]]:
+        """Incrementally decode a JSON document
+        
+        Returns (is_array, items). When the top-level value is an array its
+        elements are decoded one at a time with JSONDecoder.raw_decode over a
+        sliding buffer, so memory is bounded by the largest element. Any
+        other top-level value is yielded whole as the only item, decoded on
+        the first next(); an object is decoded member by member the same
+        way, so a large one never holds the GIL in one long json.loads.
+        """
+        reader = DataConverter.text_stream(json_content)
+        buffer = ""
+        origin = (0, 1, 0)
+        while not buffer:
+            chunk = reader.read(chunk_size)
+            if not chunk:
+                break
+            buffer = chunk.lstrip()
+            origin = DataConverter._json_advance(origin, chunk[:len(chunk) - len(buffer)])
         
-        return output.getvalue()
+        if buffer.startswith("["):
+            return True, counted(DataConverter._json_members(reader, buffer, chunk_size, origin))
+        return False, DataConverter._json_document(reader, buffer, chunk_size, origin)
     
     @staticmethod
-    def yaml_to_json(yaml_content: str) -> str:
-        """YAML → JSON"""
-        data = yaml.safe_load(yaml_content)
-        return json.dumps(data, indent=2)
+    def _json_advance(origin: Tuple[int, int, int], text: str) -> Tuple[int, int, int]:
+        """Move a (offset, line, line start offset) position past text
+        
+        The incremental parser drops text it has consumed from its buffer;
+        this keeps track of where the buffer starts in the document.
+        """
+        offset, line, line_start = origin
+        newlines = text.count("\n")
+        if newlines:
+            line += newlines
+            line_start = offset + text.rindex("\n") + 1
+        return offset + len(text), line, line_start
     
     @staticmethod
-    def yaml_to_csv(yaml_content: str) -> str:
-        """YAML → CSV"""
-        data = yaml.safe_load(yaml_content)
-        if not isinstance(data, list):
-            data = [data]
+    def _json_error(message: str, buffer: str, pos: int, origin: Tuple[int, int, int]) -> json.JSONDecodeError:
+        """JSONDecodeError for buffer[pos], located within the whole document"""
+        error = json.JSONDecodeError(message, buffer, pos)
+        error.pos, error.lineno, line_start = DataConverter._json_advance(origin, buffer[:pos])
+        error.colno = error.pos - line_start + 1
+        error.args = (f"{message}: line {error.lineno} column {error.colno} (char {error.pos})",)
+        return error
+    
+    @staticmethod
+    def _json_document(reader: io.TextIOBase, buffer: str, chunk_size: int,
+                       origin: Tuple[int, int, int]) -> Iterator[Any]:
+        """Yield a whole non-array JSON document, decoded on first use
         
-        if not data:
-            return ""
+        Decoding is deferred to iteration so it happens where the output is
+        produced (the threadpool or a pool worker), not wherever the
+        conversion was set up.
+        """
+        if buffer.startswith("{"):
+            document = dict(DataConverter._json_members(reader, buffer, chunk_size, origin))
+        else:
+            text = buffer + reader.read()
+            try:
+                document = json.loads(text)
+            except json.JSONDecodeError as e:
+                raise DataConverter._json_error(e.msg, text, e.pos, origin) from None
+        count_rows(1)
+        yield document
+    
+    @staticmethod
+    def _json_members(reader: io.TextIOBase, buffer: str, chunk_size: int,
+                      origin: Tuple[int, int, int]) -> Iterator[Any]:
+        """Yield the elements of a JSON array, or the (key, value) members of
+        a JSON object, whose opening bracket starts buffer
         
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
+        origin is where buffer starts in the document, so errors report
+        positions in the document rather than in the sliding buffer.
+        """
+        keyed = buffer.startswith("{")
+        close = "}" if keyed else "]"
+        decoder = json.JSONDecoder()
+        pos = 1
+        eof = False
+        expecting_value = False
         
-        return output.getvalue()
-
-
-converter = DataConverter()
+        def error(message: str) -> json.JSONDecodeError:
+            return DataConverter._json_error(message, buffer, pos, origin)
+        
+        def skip_whitespace():
+            nonlocal buffer, pos, eof, origin
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\n\r":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                origin = DataConverter._json_advance(origin, buffer)
+                buffer, pos = reader.read(chunk_size), 0
+                eof = not buffer
+        
+        def decode(delimiters: str) -> Any:
+            nonlocal buffer, pos, eof, origin
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    if eof:
+                        raise DataConverter._json_error(e.msg, buffer, e.pos, origin) from None
+                    end = None
+                # A number cut off by the chunk boundary still decodes
+                # ("12" of "123", "0" of "0.5"), so only trust a value
+                # once a delimiter follows it or the input is exhausted
+                if end is not None and (eof or (end < len(buffer) and buffer[end] in delimiters)):
+                    break
+                # Grow reads with the pending value so retries stay linear
+                chunk = reader.read(max(chunk_size, len(buffer) - pos))
+                eof = not chunk
+                origin = DataConverter._json_advance(origin, buffer[:pos])
+                buffer, pos = buffer[pos:] + chunk, 0
+            pos = end
+            return value
+        
+        while True:
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise error("Unterminated object" if keyed else "Unterminated array")
+            if buffer[pos] == close and not expecting_value:
+                pos += 1
+                break
+            
+            if keyed:
+                if buffer[pos] != '"':
+                    raise error("Expecting property name enclosed in double quotes")
+                key = decode(": \t\n\r")
+                skip_whitespace()
+                if pos >= len(buffer) or buffer[pos] != ":":
+                    raise error("Expecting ':' delimiter")
+                pos += 1
+                skip_whitespace()
+                yield key, decode(",} \t\n\r")
+            else:
+                yield decode(",] \t\n\r")
+            
+            skip_whitespace()
+            if pos < len(buffer) and buffer[pos] == ",":
+                pos += 1
+                expecting_value = True
+            elif pos < len(buffer) and buffer[pos] == close:
+                pos += 1
+                break
+            else:
+                raise error("Expecting ',' delimiter")
+        
+        skip_whitespace()
+        if pos < len(buffer):
+            raise error("Extra data")
+    
+    @staticmethod
+    def json_to_csv_stream(json_content: Any) -> Iterator[str]:
+        """JSON → CSV, yielded in chunks of whole rows"""
+        _, items = DataConverter.iter_json_array(json_content)
+        return DataConverter.records_to_csv_stream(items)
+    
+    @staticmethod
+    def json_to_csv(json_content: Any) -> str:
+        """JSON → CSV"""
+        return "".join(DataConverter.json_to_csv_stream(json_content))
+    
+    @staticmethod
+    def write_xml(xml: XMLGenerator, data: Any):
+        """Write JSON-style data as element content (lists become <item> children)"""
+        if isinstance(data, list):
+            for item in data:
+                xml.startElement("item", {})
+                DataConverter.write_xml(xml, item)
+                xml.endElement("item")
+        elif isinstance(data, dict):
+            for key, value in data.items():
+                xml.startElement(key, {})
+                if isinstance(value, (dict, list)):
+                    DataConverter.write_xml(xml, value)
+                else:
+                    xml.characters(str(value))
+                xml.endElement(key)
+        else:
+            xml.characters(str(data))
+    
+    @staticmethod
+    def json_to_xml_stream(json_content: Any, root_name: str = "data") -> Iterator[str]:
+        """JSON → XML, yielded in chunks of whole top-level array elements"""
+        is_array, items = DataConverter.iter_json_array(json_content)
+        return DataConverter.records_to_xml_stream(is_array, items, root_name)
+    
+    @staticmethod
+    def json_to_xml(json_content: Any, root_name: str = "data") -> str:
+        """JSON → XML"""
+        return "".join(DataConverter.json_to_xml_stream(json_content, root_name))
+    
+    @staticmethod
+    def json_to_yaml_stream(json_content: Any) -> Iterator[str]:
+        """JSON → YAML, yielded in chunks of whole top-level sequence entries"""
+        is_array, items = DataConverter.iter_json_array(json_content)
+        return DataConverter.records_to_yaml_stream(is_array, items)
+    
+    @staticmethod
+    def json_to_yaml(json_content: Any) -> str:
+        """JSON → YAML"""
+        return "".join(DataConverter.json_to_yaml_stream(json_content))
+    
+    @staticmethod
+    def elem_to_dict(elem: ET.Element) -> Any:
+        """Convert an element subtree to nested dicts (leaves become text)"""
+        result = {}
+        for child in elem:
+            child_data = DataConverter.elem_to_dict(child)
+            if child.tag in result:
+                if not isinstance(result[child.tag], list):
+                    result[child.tag] = [result[child.tag]]
+                result[child.tag].append(child_data)
+            else:
+                result[child.tag] = child_data
+        
+        if not result:
+            return elem.text
+        return result
+    
+    @staticmethod
+    def xml_to_json(xml_content: Any, indent: Optional[int] = 2) -> str:
+        """XML → JSON"""
+        root = ET.parse(DataConverter.open_source(xml_content)).getroot()
+        count_rows(len(root))
+        data = DataConverter.elem_to_dict(root)
+        return json.dumps(data, indent=indent, separators=JSON_SEPARATORS[indent is None])
+    
+    @staticmethod
+    def xml_to_json_stream(xml_content: Any, record_tag: str, ndjson: bool = False) -> Iterator[str]:
+        """XML → JSON array (or NDJSON) of one object per record element"""
+        records = (
+            DataConverter.elem_to_dict(elem)
+            for elem in DataConverter.iter_xml_records(xml_content, record_tag)
+        )
+        if ndjson:
+            return DataConverter.ndjson_stream(records)
+        return DataConverter.json_array_stream(records)
+    
+    @staticmethod
+    def iter_xml_records(xml_content: Any, record_tag: str = "item") -> Iterator[ET.Element]:
+        """Incrementally parse XML, yielding each record element as it closes
+        
+        Accepts any open_source input. Once an outermost record has
+        been consumed it is cleared and detached, and everything outside the
+        records is dropped as soon as it closes, so memory stays bounded by
+        the size of a single record rather than the whole document.
+        """
+        xml_content = DataConverter.open_source(xml_content)
+        open_elements = []
+        record_depth = 0
+        for event, elem in ET.iterparse(xml_content, events=("start", "end")):
+            if event == "start":
+                open_elements.append(elem)
+                if elem.tag == record_tag:
+                    record_depth += 1
+                continue
+            
+            open_elements.pop()
+            if elem.tag == record_tag:
+                record_depth -= 1
+                count_rows(1)
+                yield elem
+            if record_depth == 0 and open_elements:
+                # Each finished element is detached right away, so its
+                # parent never holds more than one child here
+                elem.clear()
+                open_elements[-1].remove(elem)
+    
+    @staticmethod
+    def xml_to_csv_stream(xml_content: Any, record_tag: str = "item") -> Iterator[str]:
+        """XML → CSV (flattened), yielded in chunks of whole rows"""
+        rows = (
+            {child.tag: child.text for child in item}
+            for item in DataConverter.iter_xml_records(xml_content, record_tag)
+        )
+        batches = DataConverter.record_batches(row for row in rows if row)
+        return DataConverter.batches_to_csv_stream(batches)
+    
+    @staticmethod
+    def xml_to_csv(xml_content: Any) -> str:
+        """XML → CSV (flattened)"""
+        return "".join(DataConverter.xml_to_csv_stream(xml_content))
+    
+    @staticmethod
+    def yaml_to_json(yaml_content: Any, indent: Optional[int] = 2) -> str:
+        """YAML → JSON"""
+        data = yaml.load(DataConverter.text_stream(yaml_content), Loader=YamlLoader)
+        count_rows(len(data) if isinstance(data, list) else 1)
+        return json.dumps(data, indent=indent, separators=JSON_SEPARATORS[indent is None],
+                          default=DataConverter.json_default)
+    
+    @staticmethod
+    def yaml_to_csv(yaml_content: Any) -> str:
+        """YAML → CSV"""
+        _, records = DataConverter.yaml_records(yaml_content)
+        return "".join(DataConverter.records_to_csv_stream(records))
+    
+    @staticmethod
+    def iter_ndjson(ndjson_content: Any) -> Iterator[Any]:
+        """Parse newline-delimited JSON one line at a time (blank lines skipped)"""
+        for line_number, line in enumerate(DataConverter.text_stream(ndjson_content), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number}: {e.msg}") from None
+            count_rows(1)
+            yield record
+    
+    @staticmethod
+    def csv_to_ndjson_stream(csv_content: Any, infer_types: bool = False) -> Iterator[str]:
+        """CSV → NDJSON, yielded in chunks of whole lines"""
+        return DataConverter.ndjson_stream(DataConverter.csv_rows(csv_content, infer_types))
+    
+    @staticmethod
+    def csv_to_ndjson(csv_content: Any, infer_types: bool = False) -> str:
+        """CSV → NDJSON"""
+        return "".join(DataConverter.csv_to_ndjson_stream(csv_content, infer_types))
+    
+    @staticmethod
+    def ndjson_to_csv_stream(ndjson_content: Any) -> Iterator[str]:
+        """NDJSON → CSV, yielded in chunks of whole rows"""
+        return DataConverter.records_to_csv_stream(DataConverter.iter_ndjson(ndjson_content))
+    
+    @staticmethod
+    def ndjson_to_csv(ndjson_content: Any) -> str:
+        """NDJSON → CSV"""
+        return "".join(DataConverter.ndjson_to_csv_stream(ndjson_content))
+    
+    @staticmethod
+    def ndjson_to_xml_stream(ndjson_content: Any, root_name: str = "data") -> Iterator[str]:
+        """NDJSON → XML, yielded in chunks of whole <item> elements"""
+        return DataConverter.records_to_xml_stream(True, DataConverter.iter_ndjson(ndjson_content), root_name)
+    
+    @staticmethod
+    def ndjson_to_xml(ndjson_content: Any, root_name: str = "data") -> str:
+        """NDJSON → XML"""
+        return "".join(DataConverter.ndjson_to_xml_stream(ndjson_content, root_name))
+    
+    @staticmethod
+    def ndjson_to_yaml_stream(ndjson_content: Any) -> Iterator[str]:
+        """NDJSON → YAML, yielded in chunks of whole sequence entries"""
+        return DataConverter.records_to_yaml_stream(True, DataConverter.iter_ndjson(ndjson_content))
+    
+    @staticmethod
+    def ndjson_to_yaml(ndjson_content: Any) -> str:
+        """NDJSON → YAML"""
+        return "".join(DataConverter.ndjson_to_yaml_stream(ndjson_content))
+    
+    @staticmethod
+    def xml_to_ndjson_stream(xml_content: Any, record_tag: str = "item") -> Iterator[str]:
+        """XML → NDJSON, yielded in chunks of whole lines (one per record element)"""
+        return DataConverter.xml_to_json_stream(xml_content, record_tag, ndjson=True)
+    
+    @staticmethod
+    def xml_to_ndjson(xml_content: Any, record_tag: str = "item") -> str:
+        """XML → NDJSON"""
+        return "".join(DataConverter.xml_to_ndjson_stream(xml_content, record_tag))
+    
+    # Record streams: readers turn a document into (is_array, records) the
+    # way iter_json_array does, and writers serialize such a stream. Any
+    # reader can feed any writer (see FORMAT REGISTRY below).
+    
+    @staticmethod
+    def csv_records(csv_content: Any, infer_types: bool = False) -> Tuple[bool, Iterator[Any]]:
+        """Read CSV rows as dicts keyed by the header"""
+        return True, DataConverter.csv_rows(csv_content, infer_types)
+    
+    @staticmethod
+    def xml_records(xml_content: Any, record_tag: str = "item") -> Tuple[bool, Iterator[Any]]:
+        """Read each record element as nested dicts"""
+        elements = DataConverter.iter_xml_records(xml_content, record_tag)
+        return True, (DataConverter.elem_to_dict(elem) for elem in elements)
+    
+    @staticmethod
+    def yaml_records(yaml_content: Any) -> Tuple[bool, Iterator[Any]]:
+        """Read a YAML document (a top-level sequence gives one record per entry)"""
+        data = yaml.load(DataConverter.text_stream(yaml_content), Loader=YamlLoader)
+        count_rows(len(data) if isinstance(data, list) else 1)
+        if isinstance(data, list):
+            return True, iter(data)
+        return False, iter([data])
+    
+    @staticmethod
+    def records_to_json_stream(is_array: bool, records: Iterator[Any]) -> Iterator[str]:
+        """Write records as a JSON array (or the single document as-is)"""
+        if not is_array:
+            return iter([json.dumps(next(records), default=DataConverter.json_default)])
+        return DataConverter.json_array_stream(records)
+    
+    @staticmethod
+    def records_to_ndjson_stream(is_array: bool, records: Iterator[Any]) -> Iterator[str]:
+        """Write records as NDJSON (a single document becomes one line)"""
+        return DataConverter.ndjson_stream(records)
+    
+    @staticmethod
+    def records_to_csv_stream(records: Iterator[Any]) -> Iterator[str]:
+        """Write records as CSV, with the first record's keys as header"""
+        return DataConverter.batches_to_csv_stream(DataConverter.record_batches(records))
+    
+    @staticmethod
+    def records_to_xml_stream(is_array: bool, records: Iterator[Any], root_name: str = "data") -> Iterator[str]:
+        """Write records as <item> children of root_name, incrementally"""
+        output, xml = DataConverter.xml_writer()
+        xml.startElement(root_name, {})
+        
+        if not is_array:
+            DataConverter.write_xml(xml, next(records))
+        else:
+            for record in records:
+                xml.startElement("item", {})
+                DataConverter.write_xml(xml, record)
+                xml.endElement("item")
+                if output.tell() >= STREAM_FLUSH_SIZE:
+                    yield DataConverter.drain(output)
+        
+        xml.endElement(root_name)
+        yield DataConverter.drain(output)
+    
+    @staticmethod
+    def records_to_yaml_stream(is_array: bool, records: Iterator[Any]) -> Iterator[str]:
+        """Write records as a YAML sequence (or the single document as-is)"""
+        if not is_array:
+            document = next(records)
+            if not isinstance(document, dict) or not document:
+                yield yaml.dump(document, Dumper=YamlDumper, default_flow_style=False)
+                return
+            # A top-level mapping is dumped one member at a time, keys sorted
+            # as yaml.dump sorts them; the output is identical but streams,
+            # and no single libyaml call holds the GIL for the whole document
+            try:
+                keys = sorted(document)
+            except TypeError:
+                keys = list(document)
+            yield from DataConverter.coalesce(
+                yaml.dump({key: document[key]}, Dumper=YamlDumper, default_flow_style=False) for key in keys
+            )
+            return
+        
+        empty = True
+        for chunk in DataConverter.coalesce(
+            yaml.dump([record], Dumper=YamlDumper, default_flow_style=False) for record in records
+        ):
+            empty = False
+            yield chunk
+        if empty:
+            yield yaml.dump([], Dumper=YamlDumper, default_flow_style=False)
+    
+    @staticmethod
+    def records_to_sql_stream(records: Iterator[Any], table_name: str = "data",
+                              batch_size: int = SQL_BATCH_SIZE, dialect: str = "sqlite") -> Iterator[str]:
+        """Write records as INSERT statements, with the first record's keys as columns"""
+        batches = DataConverter.record_batches(records)
+        return DataConverter.batches_to_sql_stream(batches, table_name, batch_size, dialect)
+    
+    @staticmethod
+    def records_to_xlsx_stream(records: Iterator[Any]) -> Iterator[bytes]:
+        """Write records as an XLSX sheet, with the first record's keys as header"""
+        return DataConverter.batches_to_xlsx_stream(DataConverter.record_batches(records))
+    
+    @staticmethod
+    def convert_to_file(content: Any, path: str, source: str, target: str, params: dict) -> int:
+        """Run a format-registry conversion into a file and return its size
+        
+        For targets that only exist once complete (XLSX): a pool worker
+        writes the file and the response streams it from disk.
+        """
+        size = 0
+        with open(path, "wb") as output:
+            for chunk in format_registry.convert(source, target, content, params):
+                data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                output.write(data)
+                size += len(data)
+        return size
+
+converter = DataConverter()
+
+# ============================================================================
+# FORMAT REGISTRY
+# ============================================================================
+
+class IterStream(io.RawIOBase):
+    """Read-only file over an iterator of str/bytes chunks
+    
+    Lets the output of one conversion step feed the next without
+    materializing the intermediate document.
+    """
+    
+    def __init__(self, chunks: Iterator):
+        self.chunks = iter(chunks)
+        self.pending = b""
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        while not self.pending:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return 0
+            self.pending = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+class FormatRegistry:
+    """Graph of data formats joined by readers, writers and direct converters
+    
+    A reader turns a document into an (is_array, records) stream and a
+    writer serializes one, so every readable format converts to every
+    writable one; direct converters add cheaper edges where a dedicated
+    implementation exists. plan() finds the cheapest route with Dijkstra,
+    so a new format only needs a reader and/or a writer.
+    
+    All callables take (content_or_records, params) and params holds every
+    request option; each step picks out the ones it uses.
+    """
+    
+    def __init__(self):
+        self.readers: Dict[str, Tuple[Any, int]] = {}
+        self.writers: Dict[str, Tuple[Any, int]] = {}
+        self.converters: Dict[Tuple[str, str], Tuple[Any, int]] = {}
+    
+    def add_reader(self, fmt: str, read, cost: int = 1):
+        self.readers[fmt] = (read, cost)
+    
+    def add_writer(self, fmt: str, write, cost: int = 1):
+        self.writers[fmt] = (write, cost)
+    
+    def add_converter(self, source: str, target: str, convert, cost: int = 1):
+        self.converters[(source, target)] = (convert, cost)
+    
+    @property
+    def formats(self) -> List[str]:
+        return sorted(set(self.readers) | set(self.writers) | {fmt for pair in self.converters for fmt in pair})
+    
+    def targets(self, source: str) -> List[str]:
+        """Formats reachable from source"""
+        return [fmt for fmt in self.formats if fmt != source and self._route(source, fmt) is not None]
+    
+    def _edges(self, source: str) -> Iterator[Tuple[str, int, Any]]:
+        for (start, target), (convert, cost) in self.converters.items():
+            if start == source:
+                yield target, cost, convert
+        if source in self.readers:
+            read, read_cost = self.readers[source]
+            for target, (write, write_cost) in self.writers.items():
+                if target != source:
+                    yield target, read_cost + write_cost, self._recode(read, write)
+    
+    @staticmethod
+    def _recode(read, write):
+        return lambda content, params: write(read(content, params), params)
+    
+    def _route(self, source: str, target: str) -> Optional[List[Any]]:
+        best = {source: 0}
+        queue = [(0, 0, source, [])]
+        counter = itertools.count(1)
+        while queue:
+            cost, _, fmt, steps = heapq.heappop(queue)
+            if fmt == target:
+                return steps
+            if cost > best[fmt]:
+                continue
+            for nxt, edge_cost, step in self._edges(fmt):
+                if cost + edge_cost < best.get(nxt, float("inf")):
+                    best[nxt] = cost + edge_cost
+                    heapq.heappush(queue, (cost + edge_cost, next(counter), nxt, steps + [step]))
+        return None
+    
+    def plan(self, source: str, target: str) -> List[Any]:
+        """Cheapest chain of conversion steps from source to target"""
+        steps = self._route(source, target) if source != target else None
+        if not steps:
+            raise ValueError(f"Unsupported conversion: {source} → {target}")
+        return steps
+    
+    def convert(self, source: str, target: str, content: Any, params: dict) -> Iterator:
+        """Convert content along the cheapest route, yielding output chunks"""
+        chunks = None
+        for step in self.plan(source, target):
+            chunks = step(content if chunks is None else io.BufferedReader(IterStream(chunks)), params)
+        return chunks
+
+format_registry = FormatRegistry()
+
+format_registry.add_reader("csv", lambda content, params: DataConverter.csv_records(content, params["infer_types"]))
+format_registry.add_reader("json", lambda content, params: DataConverter.iter_json_array(content))
+format_registry.add_reader("ndjson", lambda content, params: (True, DataConverter.iter_ndjson(content)))
+format_registry.add_reader("xml", lambda content, params: DataConverter.xml_records(content, params["record"]))
+# Loads the whole document before the first record comes out
+format_registry.add_reader("yaml", lambda content, params: DataConverter.yaml_records(content), cost=3)
+
+format_registry.add_writer("json", lambda stream, params: DataConverter.records_to_json_stream(*stream))
+format_registry.add_writer("ndjson", lambda stream, params: DataConverter.records_to_ndjson_stream(*stream))
+format_registry.add_writer("csv", lambda stream, params: DataConverter.records_to_csv_stream(stream[1]))
+format_registry.add_writer("xml", lambda stream, params: DataConverter.records_to_xml_stream(*stream, params["root_name"]))
+format_registry.add_writer("yaml", lambda stream, params: DataConverter.records_to_yaml_stream(*stream))
+format_registry.add_writer("sql", lambda stream, params: DataConverter.records_to_sql_stream(
+    stream[1], params["table_name"], params["batch_size"], params["dialect"]
+))
+# Holds the workbook until the end, like csv_to_xlsx_stream
+format_registry.add_writer("xlsx", lambda stream, params: DataConverter.records_to_xlsx_stream(stream[1]), cost=2)
+
+# Dedicated converters whose output differs from the generic reader/writer
+# route (CSV keeps its raw rows and tag naming, XML→CSV flattens records)
+format_registry.add_converter("csv", "xml", lambda content, params: DataConverter.csv_to_xml_stream(
+    content, params["root_name"], params["infer_types"]
+))
+format_registry.add_converter("csv", "sql", lambda content, params: DataConverter.csv_to_sql_stream(
+    content, params["table_name"], params["batch_size"], params["dialect"], params["infer_types"]
+))
+format_registry.add_converter("csv", "xlsx", lambda content, params: DataConverter.csv_to_xlsx_stream(
+    content, params["infer_types"]
+))
+format_registry.add_converter("xml", "csv", lambda content, params: DataConverter.xml_to_csv_stream(
+    content, params["record"]
+))
+
+# ============================================================================
+# CONVERSION WORKER POOL
+# ============================================================================
+
+def _run_converter(method: str, args: tuple) -> Tuple[Any, RequestMetrics]:
+    """Worker-process entry point: call a DataConverter method by name
+    
+    Returns the result and what was counted along the way (rows, decode
+    time), which can't reach the request's metrics from another process
+    any other way.
+    """
+    metrics = RequestMetrics(None)
+    request_metrics.set(metrics)
+    return getattr(DataConverter, method)(*args), metrics
+
+class ConversionPool:
+    """Runs CPU-bound DataConverter methods in worker processes
+    
+    Keeps the event loop (and /health) responsive while a large document
+    is converted. Until start() is called (or with CONVERTER_WORKERS=0)
+    conversions fall back to the threadpool.
+    """
+    
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+    
+    def start(self):
+        if self.workers > 0 and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            logger.info(f"⚙️ Conversion pool started with {self.workers} workers")
+    
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+    
+    @property
+    def queue_depth(self) -> int:
+        """Conversions waiting for a free worker"""
+        return max(0, self.in_flight - self.workers) if self.executor else 0
+    
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers if self.executor else 0,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth
+        }
+    
+    async def run(self, method: str, *args) -> Any:
+        self.in_flight += 1
+        POOL_IN_FLIGHT.inc()
+        try:
+            with timed_phase("convert"):
+                if profiling.get():
+                    result, counted = copy_context().run(_run_converter, method, args)
+                elif self.executor is None:
+                    result, counted = await run_in_threadpool(_run_converter, method, args)
+                else:
+                    loop = asyncio.get_running_loop()
+                    result, counted = await loop.run_in_executor(self.executor, _run_converter, method, args)
+        finally:
+            self.in_flight -= 1
+            POOL_IN_FLIGHT.dec()
+        metrics = request_metrics.get()
+        if metrics is not None:
+            metrics.merge(counted)
+        return result
+
+conversion_pool = ConversionPool(CONVERTER_WORKERS)
+
+# ============================================================================
+# CONVERSION RESULT CACHE
+# ============================================================================
+
+class ConversionCache:
+    """Content-addressed cache of conversion results
+    
+    Entries are keyed on the SHA-256 of the uploaded bytes plus the
+    converter method, its parameters and CACHE_VERSION. Recently used
+    results live in a per-process in-memory LRU; everything is also written
+    to a disk tier under CACHE_DIR. Gunicorn workers share the disk tier
+    and its byte budget: every write rescans the directory and removes the
+    least recently used files (by mtime, which hits refresh) until it fits.
+    A file may vanish under another process' eviction - that is simply
+    treated as a miss.
+    """
+    
+    def __init__(self, directory: str, memory_budget: int, disk_budget: int):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.max_entry_size = max(memory_budget, disk_budget)
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = 0
+        self._disk_entries = 0
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        
+        if disk_budget > 0:
+            self._evict_disk()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entry_size > 0
+    
+    @staticmethod
+    def key(method: str, digest: str, args: tuple) -> str:
+        return hashlib.sha256(f"{CACHE_VERSION}|{method}|{args!r}|{digest}".encode("utf-8")).hexdigest()
+    
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "memory_bytes": self._memory_size,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._disk_size,
+            "disk_entries": self._disk_entries
+        }
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+    
+    def _temp_path(self, key: str) -> str:
+        return f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    
+    def _remember(self, key: str, data: bytes):
+        """Insert into the memory tier (lock held)"""
+        if len(data) > self.memory_budget or key in self._memory:
+            return
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self.counters["evictions"] += 1
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Whole cached result, or None on a miss (reads the disk tier)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return data
+        if self.disk_budget <= 0:
+            return None
+        
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        
+        with self._lock:
+            self._remember(key, data)
+            self.counters["disk_hits"] += 1
+        return data
+    
+    def put(self, key: str, data: bytes):
+        """Store a result in both tiers (writes the disk tier)"""
+        if not self.enabled or len(data) > self.max_entry_size:
+            return
+        with self._lock:
+            self._remember(key, data)
+            self.counters["stores"] += 1
+        
+        if len(data) > self.disk_budget:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self._temp_path(key)
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self._path(key))
+        self._evict_disk()
+    
+    def put_file(self, key: str, path: str):
+        """Store a result that was written to a file (the file is copied, not moved)"""
+        size = os.path.getsize(path)
+        if not self.enabled or size > self.max_entry_size:
+            return
+        if size <= self.memory_budget:
+            with open(path, "rb") as f:
+                self.put(key, f.read())
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self._temp_path(key)
+        shutil.copyfile(path, temp_path)
+        self._install(key, temp_path)
+    
+    def _install(self, key: str, temp_path: str):
+        """Move a finished disk-only entry into place"""
+        os.replace(temp_path, self._path(key))
+        with self._lock:
+            self.counters["stores"] += 1
+        self._evict_disk()
+    
+    def _evict_disk(self):
+        """Remove the least recently used files until the disk tier fits its budget"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.disk_budget:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another worker evicted it first
+            total -= size
+            evicted += 1
+        
+        with self._lock:
+            self._disk_size = total
+            self._disk_entries = len(entries) - evicted
+            self.counters["evictions"] += evicted
+    
+    def tee(self, key: str, chunks: Iterator) -> Iterator:
+        """Pass a streaming result through, caching it once it completes
+        
+        Output is collected in memory up to the memory budget, then spilled
+        to a temporary file in the cache directory. Collection stops (and
+        nothing is cached) once the output grows past max_entry_size, or if
+        the stream fails or is abandoned midway.
+        """
+        collected = []
+        size = 0
+        spill = None
+        spill_path = None
+        try:
+            for chunk in chunks:
+                if collected is not None or spill is not None:
+                    data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                    size += len(data)
+                    if size > self.max_entry_size:
+                        collected = None
+                        if spill is not None:
+                            spill.close()
+                            spill = None
+                    elif spill is not None:
+                        spill.write(data)
+                    elif size > self.memory_budget:
+                        os.makedirs(self.directory, exist_ok=True)
+                        spill_path = self._temp_path(key)
+                        spill = open(spill_path, "wb")
+                        spill.writelines(collected)
+                        spill.write(data)
+                        collected = None
+                    else:
+                        collected.append(data)
+                yield chunk
+            
+            if spill is not None:
+                spill.close()
+                spill = None
+                self._install(key, spill_path)
+                spill_path = None
+            elif collected is not None:
+                self.put(key, b"".join(collected))
+        finally:
+            if spill is not None:
+                spill.close()
+            if spill_path is not None:
+                try:
+                    os.remove(spill_path)
+                except OSError:
+                    pass
+    
+    def miss(self):
+        with self._lock:
+            self.counters["misses"] += 1
+
+conversion_cache = ConversionCache(CACHE_DIR, CACHE_MEMORY_BYTES, CACHE_DISK_BYTES)
+
+# ============================================================================
+# CONVERSION LOG
+# ============================================================================
+
+class ConversionLogWriter:
+    """Write-behind buffer for ConversionLog rows
+    
+    Requests only append a dict under a lock. A daemon thread bulk-inserts
+    the buffer (one executemany INSERT in one transaction) once flush_rows
+    rows are waiting or every flush_ms, so logging never adds a commit or
+    a DB round trip to a request. If the database falls behind, rows past
+    max_pending are dropped and counted rather than piling up in memory.
+    """
+    
+    def __init__(self, flush_rows: int, flush_ms: int, max_pending: int):
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_ms / 1000
+        self.max_pending = max_pending
+        self.pending: List[dict] = []
+        self.written = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="conversion-log", daemon=True)
+            self._thread.start()
+    
+    def shutdown(self):
+        """Stop the writer thread after a final flush"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+    
+    def log(self, **row):
+        with self._lock:
+            if len(self.pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self.pending.append(row)
+            full = len(self.pending) >= self.flush_rows
+        if self._thread is None:
+            self.start()
+        if full:
+            self._wake.set()
+    
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+    
+    def flush(self):
+        """Insert everything buffered so far"""
+        with self._lock:
+            rows, self.pending = self.pending, []
+        if not rows:
+            return
+        try:
+            with engine.begin() as connection:
+                connection.execute(ConversionLog.__table__.insert(), rows)
+            with self._lock:
+                self.written += len(rows)
+        except Exception as e:
+            with self._lock:
+                self.dropped += len(rows)
+            logger.error(f"❌ Dropped {len(rows)} conversion log rows: {e}")
+    
+    def stats(self) -> dict:
+        return {"pending": len(self.pending), "written": self.written, "dropped": self.dropped}
+
+conversion_log = ConversionLogWriter(CONVERSION_LOG_FLUSH_ROWS, CONVERSION_LOG_FLUSH_MS, CONVERSION_LOG_MAX_PENDING)
+
+# ============================================================================
+# RESPONSE HELPERS
+# ============================================================================
+
+def json_envelope_response(json_result: str, billing_info: dict) -> Response:
+    """Wrap already-serialized converter output in the success envelope
+    
+    The converter's JSON text is spliced into the body as-is, so it is never
+    parsed back into Python objects or re-encoded by FastAPI.
+    """
+    with timed_phase("serialize"):
+        body = "".join([
+            '{"status":"success","format":"json","data":',
+            json_result,
+            ',"size":', str(len(json_result)),
+            ',"billing":', json.dumps(billing_info, separators=(",", ":")),
+            "}"
+        ])
+        return Response(content=body, media_type="application/json")
+
+async def prime_stream(chunks: Iterator, prime_size: int = 64 * 1024) -> Iterator:
+    """Run a streaming conversion up to its first prime_size characters
+    
+    Malformed input usually fails early, so this lets the endpoint still
+    answer with a 400 before any response headers are sent; small documents
+    are converted completely here. Errors past that point can only cut the
+    stream short. The conversion runs in the threadpool so a slow one
+    (e.g. XLSX, which only yields once the workbook is saved) never blocks
+    the event loop.
+    """
+    chunks = iter(chunks)
+    
+    def take_head() -> list:
+        head = []
+        size = 0
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= prime_size:
+                break
+        return head
+    
+    return itertools.chain(await run_blocking(take_head), chunks)
+
+# compress= value → (streaming compressor factory, media type, file suffix)
+OUTPUT_COMPRESSION = {
+    "gzip": (lambda: zlib.compressobj(6, zlib.DEFLATED, 31), "application/gzip", ".gz"),
+    "bz2": (bz2.BZ2Compressor, "application/x-bzip2", ".bz2"),
+    "xz": (lzma.LZMACompressor, "application/x-xz", ".xz"),
+}
+
+# Not worth gzip-encoding unless compress= asks for it
+PRECOMPRESSED_MEDIA_TYPES = {
+    "application/zip", "application/gzip", "application/x-bzip2", "application/x-xz",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip"""
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        if token.strip().lower() == "gzip":
+            params = params.strip().replace(" ", "")
+            return params not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def _compress_chunk(compressor: Any, data: bytes, final: bool) -> bytes:
+    output = compressor.compress(data)
+    if final:
+        output += compressor.flush()
+    return output
+
+class CompressionMiddleware:
+    """Compress successful responses as they stream out
+    
+    compress=gzip|bz2|xz returns the result as a compressed file (e.g.
+    data.json.gz); otherwise a client sending Accept-Encoding: gzip gets a
+    gzip Content-Encoding. Body chunks are gathered to CHUNK_SIZE and
+    compressed in the threadpool, so the event loop never does the work.
+    """
+    
+    CHUNK_SIZE = 64 * 1024
+    MINIMUM_SIZE = 500
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        requested = query.get("compress", [None])[0]
+        if requested is not None and requested not in OUTPUT_COMPRESSION:
+            detail = f"Unsupported compress value. Choose one of: {', '.join(OUTPUT_COMPRESSION)}"
+            response = JSONResponse(status_code=400, content={"status": "error", "detail": detail, "status_code": 400})
+            await response(scope, receive, send)
+            return
+        
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        if requested is None and not accepts_gzip(accept_encoding):
+            await self.app(scope, receive, send)
+            return
+        
+        compressor = None
+        pending = []
+        pending_size = 0
+        
+        async def compressing_send(message):
+            nonlocal compressor, pending_size
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message["headers"]))
+                media_type = headers.get("content-type", "").split(";")[0].strip()
+                length = headers.get("content-length")
+                skip = (
+                    message["status"] != 200
+                    or "content-encoding" in headers
+                    or (requested is None and (
+                        media_type in PRECOMPRESSED_MEDIA_TYPES
+                        or (length is not None and int(length) < self.MINIMUM_SIZE)
+                    ))
+                )
+                if skip:
+                    await send(message)
+                    return
+                
+                factory, file_media_type, suffix = OUTPUT_COMPRESSION[requested or "gzip"]
+                compressor = factory()
+                if "content-length" in headers:
+                    del headers["content-length"]
+                if requested:
+                    headers["content-type"] = file_media_type
+                    if "content-disposition" in headers:
+                        headers["content-disposition"] = re.sub(
+                            r'filename="?([^";]+)"?',
+                            lambda match: f'filename="{match.group(1)}{suffix}"',
+                            headers["content-disposition"]
+                        )
+                else:
+                    headers["content-encoding"] = "gzip"
+                    headers.add_vary_header("Accept-Encoding")
+                await send({**message, "headers": headers.raw})
+                return
+            
+            if message["type"] != "http.response.body" or compressor is None:
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            pending.append(body)
+            pending_size += len(body)
+            if more_body and pending_size < self.CHUNK_SIZE:
+                return
+            
+            data = b"".join(pending)
+            pending.clear()
+            pending_size = 0
+            output = await run_in_threadpool(_compress_chunk, compressor, data, not more_body)
+            if output or not more_body:
+                await send({"type": "http.response.body", "body": output, "more_body": more_body})
+        
+        await self.app(scope, receive, compressing_send)
+
+# ============================================================================
+# UPLOAD HANDLING
+# ============================================================================
+
+def upload_limit(user: Optional[User]) -> int:
+    """Largest upload (in bytes) the user's plan allows"""
+    plan = user.plan if user else "free"
+    return PLAN_UPLOAD_LIMITS.get(plan, PLAN_UPLOAD_LIMITS["free"])
+
+def upload_too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Your plan allows uploads up to {limit // (1024 * 1024)} MB"
+    )
+
+class UploadSpool:
+    """Upload body kept in memory, or in a temp file once it outgrows
+    SPOOL_MAX_MEMORY
+    
+    Converters read it back through open() (a fresh binary stream) or
+    source() (bytes or a file path, both of which can be sent to the
+    conversion pool's worker processes). The SHA-256 digest of the content
+    is computed as it is written, for the conversion cache.
+    """
+    
+    def __init__(self, max_memory: int = SPOOL_MAX_MEMORY):
+        self.size = 0
+        self.path: Optional[str] = None
+        self._max_memory = max_memory
+        self._buffer = io.BytesIO()
+        self._data = b""
+        self._hash = hashlib.sha256()
+        self.digest = ""
+    
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        if self.path is None and self.size > self._max_memory:
+            fd, self.path = tempfile.mkstemp(prefix="upload_")
+            weakref.finalize(self, _remove_spool_file, self.path)
+            spilled = self._buffer.getvalue()
+            self._buffer = os.fdopen(fd, "wb")
+            self._buffer.write(spilled)
+        self._buffer.write(chunk)
+    
+    def finish(self):
+        """Stop writing; the spool becomes readable"""
+        self.digest = self._hash.hexdigest()
+        if self.path is None:
+            self._data = self._buffer.getvalue()
+        self._buffer.close()
+    
+    def open(self) -> IO[bytes]:
+        if self.path is None:
+            return io.BytesIO(self._data)
+        return open(self.path, "rb")
+    
+    def source(self) -> Any:
+        if self.path is None:
+            return self._data
+        return Path(self.path)
+    
+    def save(self, path: str):
+        """Persist the upload at path (moving the temp file when spilled)"""
+        if self.path is None:
+            with open(path, "wb") as f:
+                f.write(self._data)
+        else:
+            shutil.move(self.path, path)
+            self.path = path
+
+def _remove_spool_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+async def spool_upload(file: UploadFile, user: Optional[User]) -> UploadSpool:
+    """Copy an upload into an UploadSpool in chunks, enforcing the plan's size cap"""
+    limit = upload_limit(user)
+    if file.size is not None and file.size > limit:
+        raise upload_too_large(limit)
+    
+    spool = UploadSpool()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if spool.size + len(chunk) > limit:
+            spool.finish()
+            raise upload_too_large(limit)
+        spool.write(chunk)
+    spool.finish()
+    
+    metrics = request_metrics.get()
+    if metrics is not None:
+        # Everything since the request arrived that no other phase claimed:
+        # receiving and parsing the multipart body, then spooling it
+        other = sum(ns for name, ns in metrics.phases.items() if name != "read")
+        metrics.phases["read"] = time.perf_counter_ns() - metrics.started - other
+        metrics.file_size += spool.size
+    return spool
+
+def plan_upload_limit(api_key: Optional[str]) -> int:
+    """Upload cap for the owner of api_key (the free cap if unknown)"""
+    if not api_key:
+        return upload_limit(None)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.api_key == api_key).first()
+    finally:
+        db.close()
+    return upload_limit(user)
+
+class UploadLimitMiddleware:
+    """Abort oversized uploads with 413 while the request body streams in
+    
+    Requests are held to the free cap until they exceed it; only then is
+    the caller's plan looked up, so normal-sized uploads cost no extra query.
+    A little slack is allowed for the multipart framing around the file.
+    """
+    
+    MULTIPART_SLACK = 64 * 1024
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        
+        limit = upload_limit(None)
+        plan_checked = False
+        api_key = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("api_key", [None])[0]
+        
+        async def within_limit(size: int) -> bool:
+            nonlocal limit, plan_checked
+            if size > limit + self.MULTIPART_SLACK and not plan_checked:
+                plan_checked = True
+                limit = await run_in_threadpool(plan_upload_limit, api_key)
+            return size <= limit + self.MULTIPART_SLACK
+        
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and not await within_limit(int(content_length)):
+            error = upload_too_large(limit)
+            response = JSONResponse(
+                status_code=error.status_code,
+                content={"status": "error", "detail": error.detail, "status_code": error.status_code}
+            )
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if not await within_limit(received):
+                    raise upload_too_large(limit)
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+# ============================================================================
+# CACHED CONVERSIONS
+# ============================================================================
+
+@functools.lru_cache(maxsize=None)
+def returns_bytes(method: str) -> bool:
+    """Whether a DataConverter method's result is binary (e.g. csv_to_xlsx)"""
+    return getattr(DataConverter, method).__annotations__.get("return") is bytes
+
+async def cached_conversion(method: str, upload: UploadSpool, *args) -> Any:
+    """Run a DataConverter method in the conversion pool, via the result cache
+    
+    Returns the method's own result type: str, or bytes for binary targets.
+    """
+    key = conversion_cache.key(method, upload.digest, args)
+    cached = None if profiling.get() else await run_in_threadpool(conversion_cache.get, key)
+    if cached is not None:
+        return cached if returns_bytes(method) else cached.decode("utf-8")
+    
+    conversion_cache.miss()
+    result = await conversion_pool.run(method, upload.source(), *args)
+    data = result if isinstance(result, bytes) else result.encode("utf-8")
+    if conversion_cache.enabled and len(data) <= conversion_cache.max_entry_size:
+        await run_in_threadpool(conversion_cache.put, key, data)
+    return result
+
+async def cached_stream(method: str, upload: UploadSpool, *args) -> Iterator:
+    """Start a streaming DataConverter method, via the result cache"""
+    return await cached_chunks(method, upload, args, lambda content: getattr(converter, method)(content, *args))
+
+async def cached_chunks(name: str, upload: UploadSpool, args: tuple, convert: Callable[[IO], Iterator]) -> Iterator:
+    """Start a streaming conversion via the result cache (keyed on name and args)"""
+    key = conversion_cache.key(name, upload.digest, args)
+    cached = None if profiling.get() else await run_in_threadpool(conversion_cache.get, key)
+    if cached is not None:
+        return iter([cached])
+    
+    conversion_cache.miss()
+    with timed_phase("convert"):
+        chunks = await run_blocking(convert, upload.open())
+    metrics = request_metrics.get()
+    if metrics is not None:
+        chunks = timed_chunks(chunks, metrics)
+    if conversion_cache.enabled:
+        chunks = conversion_cache.tee(key, chunks)
+    chunks = await prime_stream(chunks)
+    return inline_chunks(chunks) if profiling.get() else chunks
+
+def file_chunks(path: str) -> Iterator[bytes]:
+    """Stream a temporary result file, deleting it once the stream is done with"""
+    def read():
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    chunks = read()
+    weakref.finalize(chunks, _remove_spool_file, path)
+    return chunks
+
+async def pooled_file_stream(name: str, upload: UploadSpool, source: str, target: str, params: dict) -> Iterator[bytes]:
+    """Convert in the conversion pool into a temporary file and stream it, via the result cache
+    
+    For targets that can't stream while converting (XLSX): the work stays
+    off both the event loop and this process, and the result never has to
+    be pickled back from the worker.
+    """
+    key = conversion_cache.key(name, upload.digest, tuple(params.items()))
+    cached = None if profiling.get() else await run_in_threadpool(conversion_cache.get, key)
+    if cached is not None:
+        return iter([cached])
+    
+    conversion_cache.miss()
+    fd, path = tempfile.mkstemp(suffix=f".{target}")
+    os.close(fd)
+    try:
+        await conversion_pool.run("convert_to_file", upload.source(), path, source, target, params)
+        if conversion_cache.enabled and not profiling.get():
+            await run_in_threadpool(conversion_cache.put_file, key, path)
+    except BaseException:
+        _remove_spool_file(path)
+        raise
+    return file_chunks(path)
+
+# ============================================================================
+# BACKGROUND CONVERSION JOBS
+# ============================================================================
+
+# (source, target) → DataConverter method and the request parameters it
+# takes. Streaming methods are listed where they exist; stripping "_stream"
+# gives the variant that returns the whole result.
+CONVERSION_METHODS = {
+    ("csv", "json"): ("csv_to_json_stream", []),
+    ("csv", "xml"): ("csv_to_xml_stream", ["root_name"]),
+    ("csv", "yaml"): ("csv_to_yaml", []),
+    ("csv", "sql"): ("csv_to_sql_stream", ["table_name"]),
+    ("csv", "xlsx"): ("csv_to_xlsx_stream", []),
+    ("json", "csv"): ("json_to_csv_stream", []),
+    ("json", "xml"): ("json_to_xml_stream", ["root_name"]),
+    ("json", "yaml"): ("json_to_yaml_stream", []),
+    ("xml", "json"): ("xml_to_json", []),
+    ("xml", "csv"): ("xml_to_csv_stream", []),
+    ("yaml", "json"): ("yaml_to_json", []),
+    ("yaml", "csv"): ("yaml_to_csv", []),
+    ("csv", "ndjson"): ("csv_to_ndjson_stream", []),
+    ("ndjson", "csv"): ("ndjson_to_csv_stream", []),
+    ("ndjson", "xml"): ("ndjson_to_xml_stream", ["root_name"]),
+    ("ndjson", "yaml"): ("ndjson_to_yaml_stream", []),
+    ("xml", "ndjson"): ("xml_to_ndjson_stream", []),
+}
+
+# Formats whose writers only produce output once the whole document is
+# built; /convert runs them in the conversion pool via pooled_file_stream
+WHOLE_FILE_FORMATS = {"xlsx"}
+
+FORMAT_MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "xml": "application/xml",
+    "yaml": "text/yaml",
+    "sql": "text/plain",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+FILE_EXTENSION_FORMATS = {
+    "csv": "csv", "json": "json", "ndjson": "ndjson", "jsonl": "ndjson",
+    "xml": "xml", "yaml": "yaml", "yml": "yaml"
+}
+
+def strip_compressed_suffix(name: str) -> str:
+    """data.csv.gz → data.csv"""
+    return os.path.splitext(name)[0] if name.lower().endswith(COMPRESSED_SUFFIXES) else name
+
+def file_format(filename: Optional[str]) -> Optional[str]:
+    """Data format implied by a file name, looking past .gz/.bz2/.xz"""
+    extension = os.path.splitext(strip_compressed_suffix(filename or ""))[1]
+    return FILE_EXTENSION_FORMATS.get(extension.lstrip(".").lower())
+
+def job_input_path(job_id: str) -> str:
+    return os.path.join(JOB_DIR, f"{job_id}.input")
+
+def job_result_path(job_id: str) -> str:
+    return os.path.join(JOB_DIR, f"{job_id}.result")
+
+def job_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _init_job_worker():
+    """Don't reuse the parent's pooled DB connections in a forked worker"""
+    engine.dispose(close=False)
+
+def run_job(job_id: str, progress_interval: float = 1.0):
+    """Run one queued job to completion, recording progress in its row
+    
+    rows_processed is the count of input records read so far, as counted
+    for request metrics; streaming converters update it as they go, the
+    others once they finish. The job's user is billed once it completes.
+    """
+    db = SessionLocal()
+    job = None
+    metrics_token = None
+    try:
+        job = db.get(ConversionJob, job_id)
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        job.rows_processed = 0
+        job.bytes_out = 0
+        db.commit()
+        
+        metrics = RequestMetrics(job.conversion_type)
+        metrics_token = request_metrics.set(metrics)
+        result = getattr(DataConverter, job.method)(Path(job_input_path(job_id)), *json.loads(job.params))
+        chunks = [result] if isinstance(result, (str, bytes)) else result
+        
+        last_update = time.monotonic()
+        with open(job_result_path(job_id), "wb") as output:
+            for chunk in chunks:
+                data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                output.write(data)
+                job.rows_processed = metrics.rows
+                job.bytes_out += len(data)
+                if time.monotonic() - last_update >= progress_interval:
+                    db.commit()
+                    last_update = time.monotonic()
+        
+        job.rows_processed = metrics.rows
+        job.status = "completed"
+        
+        user = db.get(User, job.user_id) if job.user_id else None
+        if user and get_free_conversions_left(user.id, db) <= 0:
+            charge_user(user.id, job.conversion_type, user.plan, db)
+    except Exception as e:
+        logger.warning(f"❌ Job {job_id} failed: {e}")
+        db.rollback()
+        job = db.get(ConversionJob, job_id)
+        if job is None:
+            return
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        if metrics_token is not None:
+            request_metrics.reset(metrics_token)
+        if job is not None:
+            job.finished_at = datetime.utcnow()
+            db.commit()
+        db.close()
+        _remove_spool_file(job_input_path(job_id))
+
+def sweep_expired_jobs(ttl: timedelta) -> int:
+    """Delete the files of jobs that finished more than ttl ago and mark them expired"""
+    db = SessionLocal()
+    try:
+        jobs = db.query(ConversionJob).filter(
+            ConversionJob.status.in_(("completed", "failed")),
+            ConversionJob.finished_at < datetime.utcnow() - ttl
+        ).all()
+        for job in jobs:
+            _remove_spool_file(job_result_path(job.id))
+            job.status = "expired"
+        db.commit()
+        return len(jobs)
+    finally:
+        db.close()
+
+class JobRunner:
+    """Local worker pool that executes queued ConversionJobs
+    
+    Jobs run in their own processes (or threads with JOB_WORKERS=0), so a
+    long conversion is bounded by neither the request timeout nor the
+    event loop. Each job row records the API process that queued it, so
+    jobs left queued or running by a process that has exited are picked up
+    again by recover(). A daemon thread deletes finished jobs' files once
+    they are older than result_ttl.
+    """
+    
+    def __init__(self, workers: int, result_ttl: timedelta):
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.executor = None
+        self._stopping = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+    
+    def start(self):
+        if self.executor is not None:
+            return
+        os.makedirs(JOB_DIR, exist_ok=True)
+        if self.workers > 0:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_job_worker)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self._stopping.clear()
+        self._sweeper = threading.Thread(target=self._sweep, name="job-sweeper", daemon=True)
+        self._sweeper.start()
+    
+    def shutdown(self):
+        """Stop taking jobs; queued ones are cancelled and recovered on the next start"""
+        if self.executor is not None:
+            self._stopping.set()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            self._sweeper = None
+    
+    def submit(self, job_id: str):
+        self.start()
+        self.executor.submit(run_job, job_id)
+    
+    def _sweep(self):
+        interval = min(self.result_ttl.total_seconds(), 3600)
+        while True:
+            try:
+                expired = sweep_expired_jobs(self.result_ttl)
+                if expired:
+                    logger.info(f"🧹 Expired {expired} finished jobs")
+            except Exception as e:
+                logger.error(f"❌ Job sweep failed: {e}")
+            if self._stopping.wait(interval):
+                return
+    
+    def recover(self):
+        """Re-queue jobs whose API process on this host has exited
+        
+        Inputs live in the local JOB_DIR, so only this host's jobs can be
+        resumed; one whose input is gone is marked failed instead. Each
+        stale job is claimed with a conditional update so that several
+        workers starting together resume it only once.
+        """
+        host = socket.gethostname()
+        me = job_worker_id()
+        db = SessionLocal()
+        requeued = failed = 0
+        try:
+            stale = db.query(ConversionJob).filter(ConversionJob.status.in_(("queued", "running"))).all()
+            for job in stale:
+                owner_host, _, owner_pid = (job.worker or "").rpartition(":")
+                if job.worker is not None and (owner_host != host or process_alive(int(owner_pid))):
+                    continue
+                claimed = db.query(ConversionJob).filter(
+                    ConversionJob.id == job.id, ConversionJob.worker == job.worker
+                ).update({"worker": me}, synchronize_session=False)
+                db.commit()
+                if not claimed:
+                    continue
+                
+                db.refresh(job)
+                if os.path.exists(job_input_path(job.id)):
+                    job.status = "queued"
+                    db.commit()
+                    self.submit(job.id)
+                    requeued += 1
+                else:
+                    job.status = "failed"
+                    job.error = "Interrupted by a server restart"
+                    job.finished_at = datetime.utcnow()
+                    db.commit()
+                    failed += 1
+        finally:
+            db.close()
+        if requeued or failed:
+            logger.info(f"♻️ Recovered interrupted jobs: {requeued} re-queued, {failed} failed")
+
+job_runner = JobRunner(JOB_WORKERS, timedelta(hours=JOB_RESULT_TTL_HOURS))
 
 # ============================================================================
 # FASTAPI APPLICATION
 # ============================================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the shared worker pools with the application"""
+    conversion_pool.start()
+    job_runner.start()
+    job_runner.recover()
+    conversion_log.start()
+    yield
+    job_runner.shutdown()
+    conversion_pool.shutdown()
+    conversion_log.shutdown()
+
 app = FastAPI(
     title="📊 Data Converter API",
     description="Convert between CSV, JSON, XML, YAML, SQL, Excel instantly! With PayPal billing.",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Add CORS
@@ -475,6 +3244,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(UploadLimitMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(CompressionMiddleware)
+
 # ============================================================================
 # AUTHENTICATION ENDPOINTS
 # ============================================================================
@@ -515,17 +3289,40 @@ async def register(request: UserRegisterRequest, db: Session = Depends(get_db)):
 @app.post("/api/v1/csv-to-json")
 async def csv_to_json_endpoint(
     file: UploadFile = File(...),
+    stream: bool = Query(False),
+    compact: bool = Query(False),
+    infer_types: bool = Query(False),
     api_key: str = Query(None),
     db: Session = Depends(get_db)
 ):
-    """Convert CSV → JSON (with billing)"""
+    """Convert CSV → JSON (with billing)
+    
+    With stream=true the bare JSON array is streamed back row by row
+    instead of being wrapped in the status/billing envelope; compact=true
+    drops the indentation from the enveloped result. infer_types=true
+    emits numbers, booleans, nulls and dates instead of strings.
+    """
     try:
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        csv_str = content.decode('utf-8')
-        json_result = converter.csv_to_json(csv_str)
+        upload = await spool_upload(file, user)
+        
+        if stream:
+            json_chunks = await cached_stream("csv_to_json_stream", upload, infer_types)
+            
+            if user:
+                conversions_left = get_free_conversions_left(user.id, db)
+                if conversions_left <= 0:
+                    charge_user(user.id, "csv_to_json", user.plan, db)
+            
+            return StreamingResponse(
+                json_chunks,
+                media_type="application/json",
+                headers={"Content-Disposition": "attachment; filename=data.json"}
+            )
+        
+        json_result = await cached_conversion("csv_to_json", upload, None if compact else 2, infer_types)
         
         billing_info = {}
         if user:
@@ -539,13 +3336,7 @@ async def csv_to_json_endpoint(
             else:
                 billing_info = charge_user(user.id, "csv_to_json", user.plan, db)
         
-        return {
-            "status": "success",
-            "format": "json",
-            "data": json.loads(json_result),
-            "size": len(json_result),
-            "billing": billing_info
-        }
+        return json_envelope_response(json_result, billing_info)
     except HTTPException:
         raise
     except Exception as e:
@@ -555,6 +3346,7 @@ async def csv_to_json_endpoint(
 async def csv_to_xml_endpoint(
     file: UploadFile = File(...),
     root_name: str = Query("data"),
+    infer_types: bool = Query(False),
     api_key: str = Query(None),
     db: Session = Depends(get_db)
 ):
@@ -563,9 +3355,8 @@ async def csv_to_xml_endpoint(
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        csv_str = content.decode('utf-8')
-        xml_result = converter.csv_to_xml(csv_str, root_name)
+        upload = await spool_upload(file, user)
+        xml_chunks = await cached_stream("csv_to_xml_stream", upload, root_name, infer_types)
         
         if user:
             conversions_left = get_free_conversions_left(user.id, db)
@@ -573,7 +3364,7 @@ async def csv_to_xml_endpoint(
                 charge_user(user.id, "csv_to_xml", user.plan, db)
         
         return StreamingResponse(
-            iter([xml_result]),
+            xml_chunks,
             media_type="application/xml",
             headers={"Content-Disposition": "attachment; filename=data.xml"}
         )
@@ -585,6 +3376,7 @@ async def csv_to_xml_endpoint(
 @app.post("/api/v1/csv-to-yaml")
 async def csv_to_yaml_endpoint(
     file: UploadFile = File(...),
+    infer_types: bool = Query(False),
     api_key: str = Query(None),
     db: Session = Depends(get_db)
 ):
@@ -593,9 +3385,8 @@ async def csv_to_yaml_endpoint(
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        csv_str = content.decode('utf-8')
-        yaml_result = converter.csv_to_yaml(csv_str)
+        upload = await spool_upload(file, user)
+        yaml_result = await cached_conversion("csv_to_yaml", upload, infer_types)
         
         if user:
             conversions_left = get_free_conversions_left(user.id, db)
@@ -616,17 +3407,29 @@ async def csv_to_yaml_endpoint(
 async def csv_to_sql_endpoint(
     file: UploadFile = File(...),
     table_name: str = Query("data"),
+    batch_size: int = Query(SQL_BATCH_SIZE, ge=1, le=10000),
+    dialect: str = Query("sqlite"),
+    infer_types: bool = Query(False),
     api_key: str = Query(None),
     db: Session = Depends(get_db)
 ):
-    """Convert CSV → SQL INSERT statements (with billing)"""
+    """Convert CSV → SQL INSERT statements (with billing)
+    
+    batch_size rows are grouped into each multi-row INSERT, and identifiers
+    and strings are quoted for the chosen dialect (sqlite/postgres/mysql).
+    infer_types=true adds a typed CREATE TABLE and leaves numbers unquoted.
+    """
     try:
+        if dialect not in SQL_DIALECTS:
+            raise HTTPException(status_code=400, detail=f"Unsupported dialect. Choose one of: {', '.join(SQL_DIALECTS)}")
+        
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        csv_str = content.decode('utf-8')
-        sql_result = converter.csv_to_sql(csv_str, table_name)
+        upload = await spool_upload(file, user)
+        sql_chunks = await cached_stream(
+            "csv_to_sql_stream", upload, table_name, batch_size, dialect, infer_types
+        )
         
         if user:
             conversions_left = get_free_conversions_left(user.id, db)
@@ -634,7 +3437,7 @@ async def csv_to_sql_endpoint(
                 charge_user(user.id, "csv_to_sql", user.plan, db)
         
         return StreamingResponse(
-            iter([sql_result]),
+            sql_chunks,
             media_type="text/plain",
             headers={"Content-Disposition": "attachment; filename=data.sql"}
         )
@@ -646,6 +3449,7 @@ async def csv_to_sql_endpoint(
 @app.post("/api/v1/csv-to-xlsx")
 async def csv_to_xlsx_endpoint(
     file: UploadFile = File(...),
+    infer_types: bool = Query(False),
     api_key: str = Query(None),
     db: Session = Depends(get_db)
 ):
@@ -654,9 +3458,8 @@ async def csv_to_xlsx_endpoint(
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        csv_str = content.decode('utf-8')
-        xlsx_result = converter.csv_to_xlsx(csv_str)
+        upload = await spool_upload(file, user)
+        xlsx_chunks = await pooled_file_stream("csv_to_xlsx", upload, "csv", "xlsx", {"infer_types": infer_types})
         
         if user:
             conversions_left = get_free_conversions_left(user.id, db)
@@ -664,7 +3467,7 @@ async def csv_to_xlsx_endpoint(
                 charge_user(user.id, "csv_to_xlsx", user.plan, db)
         
         return StreamingResponse(
-            iter([xlsx_result]),
+            xlsx_chunks,
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": "attachment; filename=data.xlsx"}
         )
@@ -688,9 +3491,8 @@ async def json_to_csv_endpoint(
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        json_str = content.decode('utf-8')
-        csv_result = converter.json_to_csv(json_str)
+        upload = await spool_upload(file, user)
+        csv_chunks = await cached_stream("json_to_csv_stream", upload)
         
         if user:
             conversions_left = get_free_conversions_left(user.id, db)
@@ -698,7 +3500,7 @@ async def json_to_csv_endpoint(
                 charge_user(user.id, "json_to_csv", user.plan, db)
         
         return StreamingResponse(
-            iter([csv_result]),
+            csv_chunks,
             media_type="text/csv",
             headers={"Content-Disposition": "attachment; filename=data.csv"}
         )
@@ -719,9 +3521,8 @@ async def json_to_xml_endpoint(
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        json_str = content.decode('utf-8')
-        xml_result = converter.json_to_xml(json_str, root_name)
+        upload = await spool_upload(file, user)
+        xml_chunks = await cached_stream("json_to_xml_stream", upload, root_name)
         
         if user:
             conversions_left = get_free_conversions_left(user.id, db)
@@ -729,7 +3530,7 @@ async def json_to_xml_endpoint(
                 charge_user(user.id, "json_to_xml", user.plan, db)
         
         return StreamingResponse(
-            iter([xml_result]),
+            xml_chunks,
             media_type="application/xml",
             headers={"Content-Disposition": "attachment; filename=data.xml"}
         )
@@ -749,9 +3550,8 @@ async def json_to_yaml_endpoint(
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        json_str = content.decode('utf-8')
-        yaml_result = converter.json_to_yaml(json_str)
+        upload = await spool_upload(file, user)
+        yaml_chunks = await cached_stream("json_to_yaml_stream", upload)
         
         if user:
             conversions_left = get_free_conversions_left(user.id, db)
@@ -759,7 +3559,7 @@ async def json_to_yaml_endpoint(
                 charge_user(user.id, "json_to_yaml", user.plan, db)
         
         return StreamingResponse(
-            iter([yaml_result]),
+            yaml_chunks,
             media_type="text/yaml",
             headers={"Content-Disposition": "attachment; filename=data.yaml"}
         )
@@ -775,17 +3575,40 @@ async def json_to_yaml_endpoint(
 @app.post("/api/v1/xml-to-json")
 async def xml_to_json_endpoint(
     file: UploadFile = File(...),
+    compact: bool = Query(False),
+    record: str = Query(None),
+    ndjson: bool = Query(False),
     api_key: str = Query(None),
     db: Session = Depends(get_db)
 ):
-    """Convert XML → JSON (with billing)"""
+    """Convert XML → JSON (with billing)
+    
+    Naming the repeating element with record=<tag> streams back a bare JSON
+    array (or NDJSON with ndjson=true) holding one object per record.
+    """
     try:
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        xml_str = content.decode('utf-8')
-        json_result = converter.xml_to_json(xml_str)
+        upload = await spool_upload(file, user)
+        
+        if record:
+            json_chunks = await cached_stream(
+                "xml_to_json_stream", upload, record, ndjson
+            )
+            
+            if user:
+                conversions_left = get_free_conversions_left(user.id, db)
+                if conversions_left <= 0:
+                    charge_user(user.id, "xml_to_json", user.plan, db)
+            
+            return StreamingResponse(
+                json_chunks,
+                media_type="application/x-ndjson" if ndjson else "application/json",
+                headers={"Content-Disposition": f"attachment; filename=data.{'ndjson' if ndjson else 'json'}"}
+            )
+        
+        json_result = await cached_conversion("xml_to_json", upload, None if compact else 2)
         
         billing_info = {}
         if user:
@@ -799,13 +3622,7 @@ async def xml_to_json_endpoint(
             else:
                 billing_info = charge_user(user.id, "xml_to_json", user.plan, db)
         
-        return {
-            "status": "success",
-            "format": "json",
-            "data": json.loads(json_result),
-            "size": len(json_result),
-            "billing": billing_info
-        }
+        return json_envelope_response(json_result, billing_info)
     except HTTPException:
         raise
     except Exception as e:
@@ -822,9 +3639,8 @@ async def xml_to_csv_endpoint(
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        xml_str = content.decode('utf-8')
-        csv_result = converter.xml_to_csv(xml_str)
+        upload = await spool_upload(file, user)
+        csv_chunks = await cached_stream("xml_to_csv_stream", upload)
         
         if user:
             conversions_left = get_free_conversions_left(user.id, db)
@@ -832,7 +3648,7 @@ async def xml_to_csv_endpoint(
                 charge_user(user.id, "xml_to_csv", user.plan, db)
         
         return StreamingResponse(
-            iter([csv_result]),
+            csv_chunks,
             media_type="text/csv",
             headers={"Content-Disposition": "attachment; filename=data.csv"}
         )
@@ -848,6 +3664,7 @@ async def xml_to_csv_endpoint(
 @app.post("/api/v1/yaml-to-json")
 async def yaml_to_json_endpoint(
     file: UploadFile = File(...),
+    compact: bool = Query(False),
     api_key: str = Query(None),
     db: Session = Depends(get_db)
 ):
@@ -856,9 +3673,8 @@ async def yaml_to_json_endpoint(
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        yaml_str = content.decode('utf-8')
-        json_result = converter.yaml_to_json(yaml_str)
+        upload = await spool_upload(file, user)
+        json_result = await cached_conversion("yaml_to_json", upload, None if compact else 2)
         
         billing_info = {}
         if user:
@@ -872,13 +3688,7 @@ async def yaml_to_json_endpoint(
             else:
                 billing_info = charge_user(user.id, "yaml_to_json", user.plan, db)
         
-        return {
-            "status": "success",
-            "format": "json",
-            "data": json.loads(json_result),
-            "size": len(json_result),
-            "billing": billing_info
-        }
+        return json_envelope_response(json_result, billing_info)
     except HTTPException:
         raise
     except Exception as e:
@@ -895,9 +3705,8 @@ async def yaml_to_csv_endpoint(
         user = verify_api_key(api_key, db)
         check_rate_limit(user, db)
         
-        content = await file.read()
-        yaml_str = content.decode('utf-8')
-        csv_result = converter.yaml_to_csv(yaml_str)
+        upload = await spool_upload(file, user)
+        csv_result = await cached_conversion("yaml_to_csv", upload)
         
         if user:
             conversions_left = get_free_conversions_left(user.id, db)
@@ -914,6 +3723,486 @@ async def yaml_to_csv_endpoint(
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Conversion error: {str(e)}")
 
+# ============================================================================
+# NDJSON CONVERSION ENDPOINTS
+# ============================================================================
+
+@app.post("/api/v1/csv-to-ndjson")
+async def csv_to_ndjson_endpoint(
+    file: UploadFile = File(...),
+    infer_types: bool = Query(False),
+    api_key: str = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Convert CSV → NDJSON, one line per row (with billing)"""
+    try:
+        user = verify_api_key(api_key, db)
+        check_rate_limit(user, db)
+        
+        upload = await spool_upload(file, user)
+        ndjson_chunks = await cached_stream("csv_to_ndjson_stream", upload, infer_types)
+        
+        if user:
+            conversions_left = get_free_conversions_left(user.id, db)
+            if conversions_left <= 0:
+                charge_user(user.id, "csv_to_ndjson", user.plan, db)
+        
+        return StreamingResponse(
+            ndjson_chunks,
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=data.ndjson"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Conversion error: {str(e)}")
+
+@app.post("/api/v1/xml-to-ndjson")
+async def xml_to_ndjson_endpoint(
+    file: UploadFile = File(...),
+    record: str = Query("item"),
+    api_key: str = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Convert XML → NDJSON, one line per `record` element (with billing)"""
+    try:
+        user = verify_api_key(api_key, db)
+        check_rate_limit(user, db)
+        
+        upload = await spool_upload(file, user)
+        ndjson_chunks = await cached_stream("xml_to_ndjson_stream", upload, record)
+        
+        if user:
+            conversions_left = get_free_conversions_left(user.id, db)
+            if conversions_left <= 0:
+                charge_user(user.id, "xml_to_ndjson", user.plan, db)
+        
+        return StreamingResponse(
+            ndjson_chunks,
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=data.ndjson"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Conversion error: {str(e)}")
+
+@app.post("/api/v1/ndjson-to-csv")
+async def ndjson_to_csv_endpoint(
+    file: UploadFile = File(...),
+    api_key: str = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Convert NDJSON → CSV, read one line at a time (with billing)"""
+    try:
+        user = verify_api_key(api_key, db)
+        check_rate_limit(user, db)
+        
+        upload = await spool_upload(file, user)
+        csv_chunks = await cached_stream("ndjson_to_csv_stream", upload)
+        
+        if user:
+            conversions_left = get_free_conversions_left(user.id, db)
+            if conversions_left <= 0:
+                charge_user(user.id, "ndjson_to_csv", user.plan, db)
+        
+        return StreamingResponse(
+            csv_chunks,
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=data.csv"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Conversion error: {str(e)}")
+
+@app.post("/api/v1/ndjson-to-xml")
+async def ndjson_to_xml_endpoint(
+    file: UploadFile = File(...),
+    root_name: str = Query("data"),
+    api_key: str = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Convert NDJSON → XML, read one line at a time (with billing)"""
+    try:
+        user = verify_api_key(api_key, db)
+        check_rate_limit(user, db)
+        
+        upload = await spool_upload(file, user)
+        xml_chunks = await cached_stream("ndjson_to_xml_stream", upload, root_name)
+        
+        if user:
+            conversions_left = get_free_conversions_left(user.id, db)
+            if conversions_left <= 0:
+                charge_user(user.id, "ndjson_to_xml", user.plan, db)
+        
+        return StreamingResponse(
+            xml_chunks,
+            media_type="application/xml",
+            headers={"Content-Disposition": "attachment; filename=data.xml"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Conversion error: {str(e)}")
+
+@app.post("/api/v1/ndjson-to-yaml")
+async def ndjson_to_yaml_endpoint(
+    file: UploadFile = File(...),
+    api_key: str = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Convert NDJSON → YAML, read one line at a time (with billing)"""
+    try:
+        user = verify_api_key(api_key, db)
+        check_rate_limit(user, db)
+        
+        upload = await spool_upload(file, user)
+        yaml_chunks = await cached_stream("ndjson_to_yaml_stream", upload)
+        
+        if user:
+            conversions_left = get_free_conversions_left(user.id, db)
+            if conversions_left <= 0:
+                charge_user(user.id, "ndjson_to_yaml", user.plan, db)
+        
+        return StreamingResponse(
+            yaml_chunks,
+            media_type="text/yaml",
+            headers={"Content-Disposition": "attachment; filename=data.yaml"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Conversion error: {str(e)}")
+
+# ============================================================================
+# GENERIC CONVERSION ENDPOINT
+# ============================================================================
+
+@app.post("/api/v1/convert")
+async def convert_endpoint(
+    file: UploadFile = File(...),
+    source: str = Query(..., alias="from"),
+    target: str = Query(..., alias="to"),
+    root_name: str = Query("data"),
+    table_name: str = Query("data"),
+    batch_size: int = Query(SQL_BATCH_SIZE, ge=1, le=10000),
+    dialect: str = Query("sqlite"),
+    record: str = Query("item"),
+    infer_types: bool = Query(False),
+    api_key: str = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Convert between any two formats in the format registry (with billing)
+    
+    e.g. /api/v1/convert?from=xml&to=yaml. XML input is read one `record`
+    element at a time, infer_types=true types CSV columns; the other
+    options apply to the formats that use them.
+    """
+    try:
+        source, target = source.lower(), target.lower()
+        if dialect not in SQL_DIALECTS:
+            raise HTTPException(status_code=400, detail=f"Unsupported dialect. Choose one of: {', '.join(SQL_DIALECTS)}")
+        try:
+            format_registry.plan(source, target)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        user = verify_api_key(api_key, db)
+        check_rate_limit(user, db)
+        
+        upload = await spool_upload(file, user)
+        params = {
+            "root_name": root_name,
+            "table_name": table_name,
+            "batch_size": batch_size,
+            "dialect": dialect,
+            "record": record,
+            "infer_types": infer_types
+        }
+        name = f"convert:{source}:{target}"
+        if target in WHOLE_FILE_FORMATS:
+            chunks = await pooled_file_stream(name, upload, source, target, params)
+        else:
+            chunks = await cached_chunks(
+                name, upload, tuple(params.items()),
+                lambda content: format_registry.convert(source, target, content, params)
+            )
+        
+        if user:
+            conversions_left = get_free_conversions_left(user.id, db)
+            if conversions_left <= 0:
+                charge_user(user.id, f"{source}_to_{target}", user.plan, db)
+        
+        return StreamingResponse(
+            chunks,
+            media_type=FORMAT_MEDIA_TYPES.get(target, "application/octet-stream"),
+            headers={"Content-Disposition": f"attachment; filename=data.{target}"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Conversion error: {str(e)}")
+
+# ============================================================================
+# CONVERSION JOB ENDPOINTS
+# ============================================================================
+
+def job_to_dict(job: ConversionJob) -> dict:
+    return {
+        "job_id": job.id,
+        "conversion_type": job.conversion_type,
+        "status": job.status,
+        "input_size": job.input_size,
+        "rows_processed": job.rows_processed,
+        "bytes_out": job.bytes_out,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "status_url": f"/api/v1/jobs/{job.id}",
+        "result_url": f"/api/v1/jobs/{job.id}/result"
+    }
+
+def get_user_job(job_id: str, user: Optional[User], db: Session) -> ConversionJob:
+    """Look up a job, hiding other users' jobs behind a 404"""
+    job = db.get(ConversionJob, job_id)
+    if not job or (job.user_id is not None and (not user or user.id != job.user_id)):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/api/v1/jobs")
+async def create_job(
+    file: UploadFile = File(...),
+    target: str = Query(...),
+    source: str = Query(None),
+    root_name: str = Query("data"),
+    table_name: str = Query("data"),
+    api_key: str = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Queue a background conversion and return its job id immediately
+    
+    The source format defaults to the uploaded file's extension. The user
+    is billed when the job completes; failed jobs are not charged.
+    """
+    try:
+        user = verify_api_key(api_key, db)
+        check_rate_limit(user, db)
+        
+        if not source:
+            source = file_format(file.filename)
+        source, target = (source or "").lower(), target.lower()
+        if (source, target) not in CONVERSION_METHODS:
+            raise HTTPException(status_code=400, detail=f"Unsupported conversion: {source or '?'} → {target}")
+        method, param_names = CONVERSION_METHODS[(source, target)]
+        params = {"root_name": root_name, "table_name": table_name}
+        conversion_type = f"{source}_to_{target}"
+        
+        upload = await spool_upload(file, user)
+        job = ConversionJob(
+            id=uuid.uuid4().hex,
+            user_id=user.id if user else None,
+            conversion_type=conversion_type,
+            method=method,
+            params=json.dumps([params[name] for name in param_names]),
+            output_format=target,
+            input_size=upload.size,
+            worker=job_worker_id()
+        )
+        os.makedirs(JOB_DIR, exist_ok=True)
+        await run_in_threadpool(upload.save, job_input_path(job.id))
+        db.add(job)
+        db.commit()
+        
+        job_runner.submit(job.id)
+        logger.info(f"📥 Queued job {job.id} ({conversion_type}, {upload.size} bytes)")
+        
+        return JSONResponse(status_code=202, content=job_to_dict(job))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Job error: {str(e)}")
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str, api_key: str = Query(None), db: Session = Depends(get_db)):
+    """Job status and progress (rows processed, bytes written)"""
+    user = verify_api_key(api_key, db)
+    return job_to_dict(get_user_job(job_id, user, db))
+
+@app.get("/api/v1/jobs/{job_id}/result")
+async def get_job_result(job_id: str, api_key: str = Query(None), db: Session = Depends(get_db)):
+    """Download a completed job's output"""
+    user = verify_api_key(api_key, db)
+    job = get_user_job(job_id, user, db)
+    if job.status == "expired":
+        raise HTTPException(status_code=410, detail=f"Job results are deleted after {JOB_RESULT_TTL_HOURS} hours")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    
+    return FileResponse(
+        job_result_path(job.id),
+        media_type=FORMAT_MEDIA_TYPES[job.output_format],
+        filename=f"data.{job.output_format}"
+    )
+
+# ============================================================================
+# BATCH CONVERSION ENDPOINT
+# ============================================================================
+
+# A zip may expand to at most this multiple of the plan's upload cap
+ZIP_EXPANSION_FACTOR = 10
+
+class ZipStream(io.RawIOBase):
+    """Write-only sink for zipfile whose output is drained chunk by chunk"""
+    
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._offset
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def output_name(name: str, target: str, taken: set) -> str:
+    """Member name for a converted file, unique within the output zip"""
+    candidate = f"{os.path.splitext(strip_compressed_suffix(name))[0]}.{target}"
+    base, counter = candidate, 1
+    while candidate in taken:
+        counter += 1
+        candidate = f"{os.path.splitext(base)[0]}_{counter}.{target}"
+    taken.add(candidate)
+    return candidate
+
+def check_zip_size(archive: zipfile.ZipFile, limit: int):
+    """Reject zips whose members would expand past the plan's budget"""
+    sizes = [info.file_size for info in archive.infolist() if not info.is_dir()]
+    if any(size > limit for size in sizes) or sum(sizes) > limit * ZIP_EXPANSION_FACTOR:
+        raise upload_too_large(limit)
+
+def spool_zip_members(archive: zipfile.ZipFile) -> Iterator[Tuple[str, UploadSpool]]:
+    """Yield (name, spool) for each file in a zip, one member at a time"""
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        spool = UploadSpool()
+        with archive.open(info) as member:
+            while True:
+                chunk = member.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                spool.write(chunk)
+        spool.finish()
+        yield info.filename, spool
+
+@app.post("/api/v1/batch/{conversion}")
+async def batch_convert(
+    conversion: str,
+    files: List[UploadFile] = File(...),
+    root_name: str = Query("data"),
+    table_name: str = Query("data"),
+    api_key: str = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Convert many files in one request (e.g. /api/v1/batch/csv-to-json)
+    
+    Upload a zip or several files. Members are converted in parallel in the
+    conversion pool and a zip of the results is streamed back in completion
+    order. Every member counts against the rate limit up front, but only
+    the members that converted are billed, once all of them have finished;
+    a member that fails yields <name>.error.txt instead.
+    """
+    try:
+        user = verify_api_key(api_key, db)
+        
+        source, _, target = conversion.lower().partition("-to-")
+        if (source, target) not in CONVERSION_METHODS:
+            raise HTTPException(status_code=400, detail=f"Unsupported conversion: {conversion}")
+        method, param_names = CONVERSION_METHODS[(source, target)]
+        method = method.removesuffix("_stream")
+        params = {"root_name": root_name, "table_name": table_name}
+        args = [params[name] for name in param_names]
+        conversion_type = f"{source}_to_{target}"
+        
+        uploads = [(file.filename or f"file{i}", await spool_upload(file, user)) for i, file in enumerate(files)]
+        is_zip = False
+        if len(uploads) == 1:
+            with uploads[0][1].open() as first:
+                is_zip = zipfile.is_zipfile(first)
+        if is_zip:
+            archive = zipfile.ZipFile(uploads[0][1].open())
+            check_zip_size(archive, upload_limit(user))
+            member_count = sum(1 for info in archive.infolist() if not info.is_dir())
+            members = spool_zip_members(archive)
+        else:
+            member_count = len(uploads)
+            members = iter(uploads)
+        
+        check_rate_limit(user, db, member_count)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Batch error: {str(e)}")
+    
+    max_in_flight = max(1, conversion_pool.workers) * 2
+    
+    async def convert_member(name: str, spool: UploadSpool):
+        try:
+            result = await cached_conversion(method, spool, *args)
+            return name, result, None
+        except Exception as e:
+            return name, None, str(e)
+    
+    async def zip_chunks():
+        sink = ZipStream()
+        taken = set()
+        succeeded = 0
+        pending = set()
+        
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as output:
+            async def write_finished(done):
+                nonlocal succeeded
+                for task in done:
+                    name, result, error = task.result()
+                    if error is None:
+                        succeeded += 1
+                        await run_in_threadpool(output.writestr, output_name(name, target, taken), result)
+                    else:
+                        output.writestr(output_name(name, "error.txt", taken), error)
+            
+            while True:
+                member = await run_in_threadpool(next, members, None)
+                if member is not None:
+                    pending.add(asyncio.ensure_future(convert_member(*member)))
+                if pending and (member is None or len(pending) >= max_in_flight):
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    await write_finished(done)
+                    yield sink.drain()
+                elif member is None:
+                    break
+        if user and succeeded:
+            await run_in_threadpool(charge_user_bulk, user.id, conversion_type, user.plan, succeeded, db)
+        yield sink.drain()
+        logger.info(f"📦 Batch {conversion_type}: {succeeded} of {member_count} converted")
+    
+    return StreamingResponse(
+        zip_chunks(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={conversion_type}.zip"}
+    )
+
 # ============================================================================
 # PRICING PAGE (PAYPAL INTEGRATED)
 # ============================================================================
@@ -1471,10 +4760,83 @@ async def confirm_paypal(
     
     return {"status": "success", "message": f"Payment confirmed! {email} upgraded to {plan}"}
 
+@app.get("/api/v1/admin/profiles")
+async def list_profiles(admin_key: str = Query(...)):
+    """Recent profile=true request profiles, newest first"""
+    if admin_key != os.getenv("ADMIN_KEY", "YOUR-SECRET-ADMIN-KEY"):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    saved = sorted(Path(PROFILE_DIR).glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return {"profiles": [json.loads(p.read_text()) for p in saved]}
+
+@app.get("/api/v1/admin/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    admin_key: str = Query(...),
+    top: int = Query(30, ge=1, le=500),
+    sort: str = Query("cumulative"),
+    raw: bool = Query(False)
+):
+    """A request profile: the top functions by sort, or raw=true for the .pstats file
+    
+    Load the raw file with pstats.Stats("<id>.pstats") or snakeviz.
+    """
+    if admin_key != os.getenv("ADMIN_KEY", "YOUR-SECRET-ADMIN-KEY"):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    if not re.fullmatch(r"[0-9a-f]{16}", profile_id) or not os.path.exists(profile_path(profile_id, ".pstats")):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if raw:
+        return FileResponse(
+            profile_path(profile_id, ".pstats"),
+            media_type="application/octet-stream",
+            filename=f"{profile_id}.pstats"
+        )
+    
+    sort_keys = {"cumulative": "cumtime", "tottime": "tottime", "calls": "ncalls"}
+    if sort not in sort_keys:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort. Choose one of: {', '.join(sort_keys)}")
+    
+    stats = pstats.Stats(profile_path(profile_id, ".pstats"))
+    functions = []
+    for (filename, line, name), (calls, primitive_calls, tottime, cumtime, _) in stats.stats.items():
+        functions.append({
+            "function": f"{os.path.basename(filename)}:{line}({name})" if line else name,
+            "ncalls": calls,
+            "primitive_calls": primitive_calls,
+            "tottime": round(tottime, 6),
+            "cumtime": round(cumtime, 6)
+        })
+    functions.sort(key=lambda f: f[sort_keys[sort]], reverse=True)
+    
+    with open(profile_path(profile_id, ".json")) as f:
+        info = json.load(f)
+    return {
+        **info,
+        "total_calls": stats.total_calls,
+        "total_time": round(stats.total_tt, 6),
+        "sort": sort,
+        "functions": functions[:top]
+    }
+
 # ============================================================================
 # UTILITY ENDPOINTS
 # ============================================================================
 
+def documented_routes() -> List[APIRoute]:
+    """The API's endpoints as listed in /docs"""
+    return [route for route in app.routes if isinstance(route, APIRoute) and route.include_in_schema]
+
+@functools.lru_cache(maxsize=None)
+def dedicated_conversions() -> Dict[str, List[str]]:
+    """Targets of the /api/v1/<source>-to-<target> endpoints, by source"""
+    conversions = {}
+    for route in documented_routes():
+        match = CONVERSION_PATH.match(route.path)
+        if match and not match.group(1):
+            conversions.setdefault(match.group(2), []).append(match.group(3))
+    return conversions
+
 @app.get("/")
 async def root():
     """Root endpoint - API info"""
@@ -1482,8 +4844,8 @@ async def root():
         "name": "📊 Data Converter API",
         "version": "1.0.0",
         "status": "🚀 Online",
-        "endpoints": 15,
-        "formats": ["CSV", "JSON", "XML", "YAML", "SQL", "XLSX"],
+        "endpoints": len(documented_routes()),
+        "formats": ["CSV", "JSON", "NDJSON", "XML", "YAML", "SQL", "XLSX"],
         "billing": "PAYPAL ($6.99/pro) + UPI (₹499/pro) + PAY-PER-CONVERSION ($0.05)",
         "pricing_url": "/pricing",
         "docs_url": "/docs",
@@ -1497,21 +4859,36 @@ async def health():
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "service": "Data Converter API v1.0.0",
-        "uptime": "online"
+        "uptime": "online",
+        "yaml_backend": YAML_BACKEND,
+        "conversion_pool": conversion_pool.stats(),
+        "cache": conversion_cache.stats(),
+        "conversion_log": conversion_log.stats()
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (aggregated across gunicorn workers)"""
+    return Response(content=generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/api/v1/formats")
 async def get_formats():
     """List all supported conversion formats"""
     return {
-        "supported_formats": {
-            "csv": ["json", "xml", "yaml", "sql", "xlsx"],
-            "json": ["csv", "xml", "yaml"],
-            "xml": ["json", "csv"],
-            "yaml": ["json", "csv"]
+        "supported_formats": dedicated_conversions(),
+        "total_endpoints": len(documented_routes()),
+        "endpoints": [
+            f"{method} {route.path}" for route in documented_routes() for method in sorted(route.methods)
+        ],
+        "convert_endpoint": {
+            source: format_registry.targets(source) for source in format_registry.formats
+            if format_registry.targets(source)
+        },
+        "max_file_size": f"{PLAN_UPLOAD_LIMITS['free'] // (1024 * 1024)} MB",
+        "max_file_size_by_plan": {
+            plan: f"{limit // (1024 * 1024)} MB" for plan, limit in PLAN_UPLOAD_LIMITS.items()
         },
-        "total_endpoints": 15,
-        "max_file_size": "100 MB",
+        "yaml_backend": YAML_BACKEND,
         "billing": {
             "free_tier": "50 conversions/month",
             "pay_per_conversion": "$0.05 each",
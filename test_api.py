@@ -43,9 +43,16 @@ def test_formats():
     print_section("3. Supported Formats")
     try:
         response = requests.get(f"{BASE_URL}/api/v1/formats")
+        formats = response.json()
         print(f"Status: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        return response.status_code == 200
+        print(f"Response: {json.dumps(formats, indent=2)}")
+        # The listing follows the registered routes
+        return (
+            response.status_code == 200
+            and formats["total_endpoints"] == len(formats["endpoints"])
+            and "POST /api/v1/jobs" in formats["endpoints"]
+            and "ndjson" in formats["supported_formats"]["csv"]
+        )
     except Exception as e:
         print(f"❌ Error: {e}")
         return False
@@ -70,6 +77,26 @@ def test_csv_to_json():
         print(f"❌ Error: {e}")
         return False
 
+def test_csv_to_json_stream():
+    """Test streaming CSV to JSON conversion"""
+    print_section("4b. CSV → JSON Conversion (streaming)")
+    try:
+        csv_data = "name,age,city\nJohn,25,NYC\nJane,28,LA"
+        
+        files = {'file': ('test.csv', csv_data)}
+        response = requests.post(
+            f"{BASE_URL}/api/v1/csv-to-json",
+            files=files,
+            params={"stream": "true"}
+        )
+        
+        print(f"Status: {response.status_code}")
+        print(f"Response: {json.dumps(response.json(), indent=2)}")
+        return response.status_code == 200 and len(response.json()) == 2
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
 def test_json_to_csv():
     """Test JSON to CSV conversion"""
     print_section("5. JSON → CSV Conversion")
@@ -103,13 +130,14 @@ def test_csv_to_sql():
         response = requests.post(
             f"{BASE_URL}/api/v1/csv-to-sql",
             files=files,
-            params={"table_name": "users"}
+            params={"table_name": "crm.users"}
         )
         
         print(f"Status: {response.status_code}")
         print(f"Response (SQL format):")
         print(response.text)
-        return response.status_code == 200
+        # A schema-qualified name is quoted part by part
+        return response.status_code == 200 and 'INSERT INTO "crm"."users"' in response.text
     except Exception as e:
         print(f"❌ Error: {e}")
         return False
@@ -138,6 +166,334 @@ def test_json_to_xml():
         print(f"❌ Error: {e}")
         return False
 
+def test_csv_to_ndjson():
+    """Test CSV to NDJSON conversion"""
+    print_section("7b. CSV → NDJSON Conversion")
+    try:
+        csv_data = "name,age,city\nJohn,25,NYC\nJane,28,LA"
+        
+        files = {'file': ('test.csv', csv_data)}
+        response = requests.post(
+            f"{BASE_URL}/api/v1/csv-to-ndjson",
+            files=files
+        )
+        
+        print(f"Status: {response.status_code}")
+        print(f"Response (NDJSON format):")
+        print(response.text)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        return response.status_code == 200 and len(lines) == 2
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_conversion_job():
+    """Test background conversion job"""
+    print_section("8. Background Job (CSV → JSON)")
+    try:
+        import time
+        csv_data = "name,age,city\nJohn,25,NYC\nJane,28,LA"
+        
+        files = {'file': ('test.csv', csv_data)}
+        response = requests.post(
+            f"{BASE_URL}/api/v1/jobs",
+            files=files,
+            params={"target": "json"}
+        )
+        print(f"Status: {response.status_code}")
+        job = response.json()
+        
+        for _ in range(30):
+            job = requests.get(f"{BASE_URL}{job['status_url']}").json()
+            if job["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.5)
+        print(f"Job: {json.dumps(job, indent=2)}")
+        
+        result = requests.get(f"{BASE_URL}{job['result_url']}")
+        print(f"Result: {result.text}")
+        return result.status_code == 200 and len(result.json()) == 2
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_metrics():
+    """Test Prometheus metrics endpoint"""
+    print_section("9. Prometheus Metrics")
+    try:
+        response = requests.get(f"{BASE_URL}/metrics")
+        print(f"Status: {response.status_code}")
+        lines = [line for line in response.text.splitlines() if line.startswith("converter_request_duration_seconds_count")]
+        print("\n".join(lines))
+        return response.status_code == 200 and len(lines) > 0
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_health_during_xlsx():
+    """Test that a slow XLSX conversion doesn't block other requests"""
+    print_section("10. Health Check During Large CSV → XLSX")
+    try:
+        import threading
+        import time
+        csv_data = "id,name,amount\n" + "".join(f"{i},name{i},{i * 1.5}\n" for i in range(200000))
+        status = {}
+        
+        def convert():
+            files = {'file': ('big.csv', csv_data)}
+            status["code"] = requests.post(f"{BASE_URL}/api/v1/csv-to-xlsx", files=files).status_code
+        
+        worker = threading.Thread(target=convert)
+        worker.start()
+        slowest = 0.0
+        while worker.is_alive():
+            started = time.perf_counter()
+            requests.get(f"{BASE_URL}/health", timeout=60)
+            slowest = max(slowest, time.perf_counter() - started)
+            time.sleep(0.1)
+        worker.join()
+        
+        print(f"Conversion status: {status.get('code')}")
+        print(f"Slowest /health: {slowest:.3f}s")
+        return status.get("code") == 200 and slowest < 1.0
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_batch_xlsx():
+    """Test batch conversion to a binary target (run twice for the cached path)"""
+    print_section("11. Batch CSV → XLSX")
+    try:
+        import io
+        import zipfile
+        files = [
+            ('files', ('first.csv', "name,age\nJohn,25\n")),
+            ('files', ('second.csv', "name,age\nJane,28\n")),
+        ]
+        ok = True
+        for attempt in ("fresh", "cached"):
+            response = requests.post(f"{BASE_URL}/api/v1/batch/csv-to-xlsx", files=files)
+            archive = zipfile.ZipFile(io.BytesIO(response.content))
+            names = sorted(archive.namelist())
+            print(f"{attempt}: status {response.status_code}, members {names}")
+            ok = ok and response.status_code == 200 and names == ["first.xlsx", "second.xlsx"]
+            ok = ok and all(archive.read(name).startswith(b"PK") for name in names)
+        return ok
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_csv_to_sql_typed():
+    """Test that typed DDL covers values past the first batch of rows"""
+    print_section("12. CSV → SQL with infer_types")
+    try:
+        import sqlite3
+        rows = [f"{i},{i % 2 == 0},{i}" for i in range(1500)]
+        rows[1200] = "abc,maybe,1200"
+        csv_data = "code,flag,amount\n" + "\n".join(rows) + "\n"
+        
+        files = {'file': ('typed.csv', csv_data)}
+        response = requests.post(
+            f"{BASE_URL}/api/v1/csv-to-sql",
+            files=files,
+            params={"table_name": "typed", "infer_types": "true", "dialect": "postgres"}
+        )
+        create_table = response.text.split(";")[0]
+        print(f"Status: {response.status_code}")
+        print(create_table)
+        
+        sqlite_sql = requests.post(
+            f"{BASE_URL}/api/v1/csv-to-sql",
+            files=files,
+            params={"table_name": "typed", "infer_types": "true"}
+        ).text
+        db = sqlite3.connect(":memory:")
+        db.executescript(sqlite_sql)
+        count = db.execute("SELECT COUNT(*) FROM typed").fetchone()[0]
+        print(f"Rows loaded into SQLite: {count}")
+        return (
+            response.status_code == 200
+            and '"code" TEXT' in create_table
+            and '"flag" TEXT' in create_table
+            and '"amount" BIGINT' in create_table
+            and count == 1500
+        )
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_cache_hit():
+    """Test that a repeated conversion is served from the result cache"""
+    print_section("13. Conversion Cache Hit")
+    try:
+        import uuid
+        csv_data = f"name,token\nJohn,{uuid.uuid4()}\n"
+        
+        def hits():
+            cache = requests.get(f"{BASE_URL}/health").json()["cache"]
+            return cache["memory_hits"] + cache["disk_hits"]
+        
+        before = hits()
+        first = requests.post(f"{BASE_URL}/api/v1/csv-to-json", files={'file': ('test.csv', csv_data)})
+        second = requests.post(f"{BASE_URL}/api/v1/csv-to-json", files={'file': ('test.csv', csv_data)})
+        after = hits()
+        print(f"Cache hits: {before} → {after}")
+        return first.status_code == second.status_code == 200 and first.json()["data"] == second.json()["data"] and after == before + 1
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_cache_eviction():
+    """Test the result cache's LRU eviction and disk spill (runs locally)"""
+    print_section("14. Conversion Cache Eviction")
+    try:
+        import os
+        import tempfile
+        os.environ.setdefault("DATABASE_URL", "sqlite://")
+        from main import ConversionCache
+        
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ConversionCache(directory, memory_budget=100, disk_budget=250)
+            for name in "abc":
+                cache.put(name, name.encode() * 100)
+            evicted = cache.get("a") is None and cache.get("c") == b"c" * 100
+            
+            streamed = b"".join(cache.tee("big", iter([b"x" * 80, b"y" * 80])))
+            spilled = cache.get("big") == streamed and not any(name.endswith(".tmp") for name in os.listdir(directory))
+            stats = cache.stats()
+            print(f"Stats: {json.dumps(stats, indent=2)}")
+            return evicted and spilled and stats["disk_bytes"] <= 250 and stats["evictions"] > 0
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_csv_to_xlsx_cells():
+    """Test how CSV → XLSX stores numeric-looking fields"""
+    print_section("15. CSV → XLSX Cell Types")
+    try:
+        import io
+        from openpyxl import load_workbook
+        csv_data = "code,mixed,id\n00123,123,12345678901234567890\n7,abc,42\n"
+        
+        files = {'file': ('codes.csv', csv_data)}
+        response = requests.post(f"{BASE_URL}/api/v1/csv-to-xlsx", files=files)
+        sheet = load_workbook(io.BytesIO(response.content)).active
+        rows = [tuple(cell.value for cell in row) for row in sheet.iter_rows(min_row=2)]
+        print(f"Status: {response.status_code}")
+        print(f"Rows: {rows}")
+        # Numbers are typed cell by cell (zero padding is lost, as with
+        # pandas), but integers beyond Excel's 15 digits stay text
+        return response.status_code == 200 and rows == [(123, 123, "12345678901234567890"), (7, "abc", 42)]
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_json_parser():
+    """Test the incremental JSON parser on large, odd and malformed input"""
+    print_section("16. Incremental JSON Parsing")
+    try:
+        import threading
+        import time
+        # Elements straddle the parser's 64KB reads, numbers included
+        records = [{"id": i, "value": i * 0.5, "note": "x" * (i % 50)} for i in range(20000)]
+        array = requests.post(
+            f"{BASE_URL}/api/v1/json-to-csv",
+            files={'file': ('big.json', "  \n" + json.dumps(records, indent=1))}
+        )
+        rows = array.text.splitlines()
+        print(f"Array → CSV: {array.status_code}, {len(rows) - 1} rows")
+        ok = array.status_code == 200 and len(rows) == 20001 and rows[-1].startswith("19999,9999.5,")
+        
+        malformed = requests.post(
+            f"{BASE_URL}/api/v1/json-to-csv",
+            files={'file': ('bad.json', '[{"id": 1}, {"id": 2} {"id": 3}]')}
+        )
+        detail = malformed.json().get("detail", "")
+        print(f"Malformed array: {malformed.status_code}, {detail}")
+        # The error points into the document, not the parser's read buffer
+        ok = ok and malformed.status_code == 400 and "line 1 column 23 (char 22)" in detail
+        
+        # A top-level object is decoded whole; that must not stall other requests
+        document = json.dumps({f"key{i}": {"values": list(range(20))} for i in range(200000)})
+        status = {}
+        
+        def convert():
+            files = {'file': ('object.json', document)}
+            status["code"] = requests.post(f"{BASE_URL}/api/v1/json-to-yaml", files=files).status_code
+        
+        worker = threading.Thread(target=convert)
+        worker.start()
+        slowest = 0.0
+        while worker.is_alive():
+            started = time.perf_counter()
+            requests.get(f"{BASE_URL}/health", timeout=60)
+            slowest = max(slowest, time.perf_counter() - started)
+            time.sleep(0.1)
+        worker.join()
+        print(f"Object → YAML: {status.get('code')}, slowest /health {slowest:.3f}s")
+        return ok and status.get("code") == 200 and slowest < 1.0
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_upload_limit():
+    """Test that an oversized upload is refused before its body is read"""
+    print_section("17. Upload Size Limit")
+    try:
+        import http.client
+        from urllib.parse import urlparse
+        # Announce 200MB (over the 100MB free cap) but send no body: the
+        # limit is checked against Content-Length up front
+        url = urlparse(BASE_URL)
+        connection = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+        connection.putrequest("POST", "/api/v1/csv-to-json")
+        connection.putheader("Content-Type", "multipart/form-data; boundary=x")
+        connection.putheader("Content-Length", str(200 * 1024 * 1024))
+        connection.endheaders()
+        response = connection.getresponse()
+        body = json.loads(response.read())
+        connection.close()
+        print(f"Status: {response.status}")
+        print(f"Detail: {body.get('detail')}")
+        return response.status == 413 and body.get("status_code") == 413
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_type_inference():
+    """Test that infer_types gives each column one type over the whole file"""
+    print_section("18. Type Inference")
+    try:
+        rows = [f"{i},{i},+{i}" for i in range(1500)]
+        rows[1200] = "abc,1200,+1200"
+        rows[5] = "5,-0,+5"
+        csv_data = "code,amount,signed\n" + "\n".join(rows) + "\n"
+        
+        ok = True
+        for endpoint in ("csv-to-json", "csv-to-ndjson"):
+            params = {"infer_types": "true"}
+            if endpoint == "csv-to-json":
+                params["stream"] = "true"
+            response = requests.post(
+                f"{BASE_URL}/api/v1/{endpoint}",
+                files={'file': ('typed.csv', csv_data)},
+                params=params
+            )
+            if endpoint == "csv-to-json":
+                records = response.json()
+            else:
+                records = [json.loads(line) for line in response.text.splitlines()]
+            types = {key: {type(record[key]).__name__ for record in records} for key in records[0]}
+            print(f"{endpoint}: {response.status_code}, types {types}")
+            # "abc" in row 1200 makes code text from the first row on; "-0"
+            # and a leading "+" aren't numbers as written
+            ok = ok and response.status_code == 200 and types == {"code": {"str"}, "amount": {"str"}, "signed": {"str"}}
+            ok = ok and records[5] == {"code": "5", "amount": "-0", "signed": "+5"}
+        return ok
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("\n" + "="*50)
@@ -151,9 +507,22 @@ def main():
         "API Info": test_root(),
         "Supported Formats": test_formats(),
         "CSV → JSON": test_csv_to_json(),
+        "CSV → JSON (stream)": test_csv_to_json_stream(),
         "JSON → CSV": test_json_to_csv(),
         "CSV → SQL": test_csv_to_sql(),
         "JSON → XML": test_json_to_xml(),
+        "CSV → NDJSON": test_csv_to_ndjson(),
+        "Background Job": test_conversion_job(),
+        "Metrics": test_metrics(),
+        "Health During XLSX": test_health_during_xlsx(),
+        "Batch → XLSX": test_batch_xlsx(),
+        "CSV → SQL (typed)": test_csv_to_sql_typed(),
+        "Cache Hit": test_cache_hit(),
+        "Cache Eviction": test_cache_eviction(),
+        "XLSX Cell Types": test_csv_to_xlsx_cells(),
+        "JSON Parser": test_json_parser(),
+        "Upload Limit": test_upload_limit(),
+        "Type Inference": test_type_inference(),
     }
     
     print_section("Test Results Summary")